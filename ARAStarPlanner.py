@@ -0,0 +1,210 @@
+from AStarPlanner import AStarPlanner
+from Cell import CellLabel
+from Heuristics import isHeuristicConsistent
+
+import time
+
+# This class implements Anytime Repairing A* (ARA*, Likhachev, Gordon
+# and Thrun, 2003). It first runs A* with the heuristic inflated by a
+# large factor epsilon, which finds a path quickly but which can be up
+# to epsilon times longer than the shortest one. It then lowers
+# epsilon step by step and improves the path, reusing the results of
+# the previous searches, until epsilon reaches 1 (and the path is
+# optimal) or the deadline passes.
+#
+# After each search, the best path so far and a bound on how much
+# longer it can be than the shortest path are stored, so they can be
+# read with getBestPath and getSuboptimalityBound whenever planning
+# stops. The heuristic must be registered as consistent (see
+# Heuristics), so the default is "diagonal"; "euclidean" and "zero"
+# also work.
+#
+# Example:
+#
+#   planner = ARAStarPlanner(occupancyGrid, initialEpsilon=3.0)
+#   planner.prepare()
+#   planner.plan(startCoords, goalCoords, deadline=time.time() + 0.1)
+#   path = planner.getBestPath()
+#   bound = planner.getSuboptimalityBound()
+#
+# The deadline is only checked once the search has started. Setting up
+# the search, which on the first call builds the whole search grid,
+# cannot be interrupted and can take longer than the deadline on a
+# large map. prepare builds the search grid in advance, so that plan
+# only has to reset it. The time spent setting up the last search is
+# kept in setUpTimeInSeconds.
+
+class ARAStarPlanner(AStarPlanner):
+
+    # The number of cells expanded between checks of the deadline
+    DEADLINE_CHECK_INTERVAL = 64
+
+    def __init__(this, occupancyGrid, heuristic="diagonal", initialEpsilon=3.0, \
+                 epsilonDecrement=0.5):
+        if (isHeuristicConsistent(heuristic) == False):
+            raise ValueError("ARA* needs a consistent heuristic, not " + str(heuristic))
+        AStarPlanner.__init__(this, occupancyGrid, heuristic)
+        this.initialEpsilon = initialEpsilon
+        this.epsilonDecrement = epsilonDecrement
+        this.epsilon = initialEpsilon
+        this.closedCells = set()
+        this.inconsistentCells = set()
+        this.bestPath = None
+        this.bestPathCost = float("inf")
+        this.suboptimalityBound = float("inf")
+        this.setUpTimeInSeconds = 0
+
+    # Build the search grid from the occupancy grid now, rather than
+    # in the first call to plan
+    def prepare(this):
+        if (this.searchGrid is None):
+            this.searchGrid = this.searchGridClass.fromOccupancyGrid(this.occupancyGrid)
+        else:
+            this.searchGrid.resetFromOccupancyGrid(this.occupancyGrid)
+
+    # The priority of a cell for the current value of epsilon
+    def getPriority(this, cell):
+        return cell.pathCost + this.epsilon * this.heuristic(cell)
+
+    # Plan from startCoords to goalCoords. Planning stops when a path
+    # with epsilon equal to 1 has been found, or when time.time()
+    # passes deadline. If deadline is None, planning runs until the
+    # path is optimal. Returns True if a path has been found.
+    def plan(this, startCoords, goalCoords, deadline=None):
+
+        # Set up the search grid, the start and the goal
+        startTime = time.time()
+        this.setUpSearch(startCoords, goalCoords)
+        this.setUpTimeInSeconds = time.time() - startTime
+
+        this.Queue.clear()
+        this.closedCells = set()
+        this.inconsistentCells = set()
+        this.bestPath = None
+        this.bestPathCost = float("inf")
+        this.suboptimalityBound = float("inf")
+        this.numberOfCellsVisited = 0
+        this.goalReached = False
+
+        this.epsilon = max(this.initialEpsilon, 1.0)
+        this.Queue.push(this.start, this.getPriority(this.start))
+        if (this.activeStats is not None):
+            this.activeStats.recordPush()
+
+        while True:
+            if (this.improvePath(deadline) == False):
+                break
+            this.recordBestPath()
+
+            if ((this.epsilon <= 1.0) or \
+                ((deadline is not None) and (time.time() >= deadline))):
+                break
+
+            # Lower epsilon, move the inconsistent cells back onto the
+            # queue and reorder the queue for the new epsilon
+            this.epsilon = max(this.epsilon - this.epsilonDecrement, 1.0)
+            cells = set(this.inconsistentCells)
+            while (this.Queue.isEmpty() == False):
+                cells.add(this.Queue.pop())
+                if (this.activeStats is not None):
+                    this.activeStats.recordPop()
+            for cell in cells:
+                this.Queue.push(cell, this.getPriority(cell))
+                if (this.activeStats is not None):
+                    this.activeStats.recordPush()
+            this.inconsistentCells = set()
+            this.closedCells = set()
+
+        # Draw the final results if required
+        this.drawCurrentState()
+
+        this.printResult()
+
+        return this.goalReached
+
+    # Expand cells until no cell on the queue can improve the path to
+    # the goal for the current epsilon. Cells whose cost drops after
+    # they have been expanded in this search are not expanded again,
+    # but are kept as inconsistent cells for the next search. Returns
+    # False if the deadline passed first.
+    def improvePath(this, deadline):
+        goal = this.goal
+        queue = this.Queue
+        closedCells = this.closedCells
+        stats = this.activeStats
+        numberOfExpansions = 0
+
+        while ((queue.isEmpty() == False) and (goal.pathCost > queue.getTopPriority())):
+            if ((deadline is not None) and \
+                (numberOfExpansions % this.DEADLINE_CHECK_INTERVAL == 0) and \
+                (time.time() >= deadline)):
+                return False
+            numberOfExpansions = numberOfExpansions + 1
+
+            cell = queue.pop()
+            if (stats is not None):
+                stats.recordPop()
+            closedCells.add(cell)
+            this.numberOfCellsVisited = this.numberOfCellsVisited + 1
+            if (cell.label == CellLabel.ALIVE):
+                this.setCellLabel(cell, CellLabel.DEAD)
+
+            for nextCell in this.getNextCellsToBeVisited(cell):
+                distance = cell.pathCost + this.costModel.getEdgeCost(cell, nextCell)
+                if (distance < nextCell.pathCost):
+                    if ((stats is not None) and (nextCell.pathCost < float("inf"))):
+                        stats.recordDuplicate()
+                    nextCell.pathCost = distance
+                    nextCell.parent = cell
+                    if (nextCell.label == CellLabel.UNVISITED):
+                        this.setCellLabel(nextCell, CellLabel.ALIVE)
+                    if nextCell in closedCells:
+                        this.inconsistentCells.add(nextCell)
+                    else:
+                        if ((stats is not None) and (nextCell not in queue)):
+                            stats.recordPush()
+                        queue.push(nextCell, this.getPriority(nextCell))
+
+            # Draw the update if required
+            if (this.showGraphicsEachIteration == True):
+                this.drawCurrentStateIfDue()
+
+        return True
+
+    # Store the path found by the last search, if it is better than
+    # the best one so far, and update the suboptimality bound. The
+    # bound is the cost of the path divided by the smallest
+    # uninflated f value of any cell which could still improve it,
+    # and is never more than epsilon.
+    def recordBestPath(this):
+        goalCost = this.goal.pathCost
+        if (goalCost == float("inf")):
+            return
+
+        lowerBound = goalCost
+        for cell in list(this.Queue) + list(this.inconsistentCells):
+            lowerBound = min(lowerBound, cell.pathCost + this.heuristic(cell))
+
+        if (goalCost < this.bestPathCost):
+            this.bestPathCost = goalCost
+            this.bestPath = this.extractPath(this.goal)
+        if (lowerBound > 0):
+            this.suboptimalityBound = min(this.epsilon, goalCost / lowerBound)
+        else:
+            this.suboptimalityBound = 1.0
+        this.goalReached = True
+
+    # The best path found so far, or None if no path has been found
+    def getBestPath(this):
+        return this.bestPath
+
+    # The largest factor by which the best path can be longer than the
+    # shortest path. This is infinite if no path has been found.
+    def getSuboptimalityBound(this):
+        return this.suboptimalityBound
+
+    # The path to the goal is the best path found
+    def extractPathToGoal(this):
+        if (this.bestPath is None):
+            return this.extractPath(this.goal)
+        return this.bestPath
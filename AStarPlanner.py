@@ -1,59 +1,78 @@
 from PlannerBase import PlannerBase
+from PriorityQueue import PriorityQueue
 from Cell import CellLabel
+from Heuristics import getHeuristic, computeHeuristicField
 
-import math
+# The heuristic can be the name of a heuristic in the registry in
+# Heuristics (for example "euclidean") or a function h(x, y, goalX,
+# goalY). It is looked up once, when the planner is created. The
+# heuristic is multiplied by (1 + hscale), and by the heuristic scale
+# of the cost model to convert it to the units of the path costs.
+#
+# If useHeuristicField is True, the heuristic is worked out for every
+# cell of the map when the goal changes, and is then read from that
+# array during the search. This is worthwhile when many queries share
+# a goal, or the heuristic is expensive.
 
 class AStarPlanner(PlannerBase):
 
-    def __init__(this, occupancyGrid, heuristic, hscale=0):
+    def __init__(this, occupancyGrid, heuristic, hscale=0, useHeuristicField=False):
         PlannerBase.__init__(this, occupancyGrid)
-        this.Queue = dict()
+        this.Queue = PriorityQueue()
         this.Heuristic = heuristic
         this.Hscale = hscale
+        this.heuristicFunction = getHeuristic(heuristic)
+        this.useHeuristicField = useHeuristicField
+        this.heuristicField = None
+        this.heuristicFieldKey = None
 
-    # Add to dictionary with score as value
+    # Add to the priority queue with score as priority
     def pushCellOntoQueue(this, cell):
         if cell.parent:
-            cell.pathCost = cell.parent.pathCost + cell.distanceToCell(cell.parent)
-        this.Queue[cell] = cell.pathCost + this.heuristic(cell)
-    
-    def heuristic(this, cell):
-        if this.Heuristic == "zero":
-            h = 0
-        
-        if this.Heuristic == "euclidean":
-            h = cell.distanceToCell(this.goal)
-
-        if this.Heuristic == "manhattan":
-            x = abs(cell.coords[0]-this.goal.coords[0])
-            y = abs(cell.coords[1]-this.goal.coords[1])
-            h = x+y
+            cell.pathCost = cell.parent.pathCost + this.costModel.getEdgeCost(cell.parent, cell)
+        this.Queue.push(cell, cell.pathCost + this.heuristic(cell))
 
+    def heuristic(this, cell):
+        coords = cell.coords
+        if (this.heuristicField is not None):
+            return this.heuristicField[coords[1] * this.occupancyGrid.width + coords[0]]
+        goalCoords = this.goal.coords
+        h = this.heuristicFunction(coords[0], coords[1], goalCoords[0], goalCoords[1])
+        return h * (1.0 + this.Hscale) * this.costModel.heuristicScale
 
-        if this.Heuristic == "diagonal":
-            x = abs(cell.coords[0]-this.goal.coords[0])
-            y = abs(cell.coords[1]-this.goal.coords[1])
-            h = (x+y) + (math.sqrt(2) - 2)*min(x,y)
-
-        return h * (1.0 + this.Hscale)
+    # Set up the search, and compute the heuristic field if it is
+    # used and is out of date
+    def setUpSearch(this, startCoords, goalCoords):
+        PlannerBase.setUpSearch(this, startCoords, goalCoords)
+        if (this.useHeuristicField == True):
+            key = (tuple(goalCoords), this.Hscale, this.costModel, \
+                   this.occupancyGrid.width, this.occupancyGrid.height)
+            if (key != this.heuristicFieldKey):
+                this.heuristicField = computeHeuristicField(this.heuristicFunction, \
+                                                            this.occupancyGrid.width, \
+                                                            this.occupancyGrid.height, \
+                                                            goalCoords, \
+                                                            (1.0 + this.Hscale) * \
+                                                            this.costModel.heuristicScale)
+                this.heuristicFieldKey = key
+        else:
+            this.heuristicField = None
 
     # Check the queue size is zero
     def isQueueEmpty(this):
-        return not this.Queue
+        return this.Queue.isEmpty()
 
     # Get cell with smallest score
     def popCellFromQueue(this):
-        cell = min(this.Queue, key=this.Queue.get)
-        del this.Queue[cell]
-        return cell
+        return this.Queue.pop()
 
 
     # If cell is alive, check for more efficient path
     def resolveDuplicate(this, cell, parentCell):
         if cell.label != CellLabel.DEAD:
-            distance = parentCell.pathCost + cell.distanceToCell(parentCell)
+            distance = parentCell.pathCost + this.costModel.getEdgeCost(parentCell, cell)
             if distance < cell.pathCost:
                 cell.pathCost = distance
                 cell.parent = parentCell
-                this.Queue[cell] = cell.pathCost + this.heuristic(cell)
+                this.Queue.push(cell, cell.pathCost + this.heuristic(cell))
             
@@ -0,0 +1,119 @@
+from SearchGrid import SearchGrid
+from Cell import Cell, CellLabel
+from array import array
+
+# Map from the integer code stored in the label array to the label
+LABELS_FROM_CODES = dict((label.value, label) for label in CellLabel)
+
+# This class is a lightweight view onto a single cell of an
+# ArraySearchGrid. It has the same attributes as a Cell (coords,
+# label, parent and pathCost), but these are read from and written to
+# the arrays of the search grid. Views are created on demand and two
+# views of the same cell compare equal, so they can be used as keys in
+# the planners' queues.
+
+class CellView(Cell):
+
+    def __init__(this, grid, index):
+        this.grid = grid
+        this.index = index
+
+    @property
+    def coords(this):
+        return (this.index % this.grid.width, this.index // this.grid.width)
+
+    @property
+    def label(this):
+        return LABELS_FROM_CODES[this.grid.labels[this.index]]
+
+    @label.setter
+    def label(this, label):
+        this.grid.labels[this.index] = label.value
+
+    @property
+    def parent(this):
+        parentIndex = this.grid.parents[this.index]
+        if (parentIndex < 0):
+            return None
+        return CellView(this.grid, parentIndex)
+
+    @parent.setter
+    def parent(this, parentCell):
+        if (parentCell is None):
+            this.grid.parents[this.index] = -1
+        else:
+            this.grid.parents[this.index] = parentCell.index
+
+    @property
+    def pathCost(this):
+        return this.grid.pathCosts[this.index]
+
+    @pathCost.setter
+    def pathCost(this, pathCost):
+        this.grid.pathCosts[this.index] = pathCost
+
+    def __eq__(this, other):
+        return isinstance(other, CellView) and (this.index == other.index) \
+            and (this.grid is other.grid)
+
+    def __ne__(this, other):
+        return not this.__eq__(other)
+
+    def __hash__(this):
+        return this.index
+
+# This class stores the state of a search grid in flat arrays rather
+# than in one Cell object per grid square. Each cell is identified by
+# its flat index, y * width + x. The arrays hold the label code, the
+# index of the parent cell (-1 if there is none) and the path cost.
+# This uses a few bytes per cell and is much faster to set up on
+# large maps. The planners access the cells through CellView objects
+# returned by getCellFromCoords, so they work with either type of
+# search grid. As with SearchGrid, only the touched cells are reset
+# between searches on an unchanged map.
+
+class ArraySearchGrid(SearchGrid):
+
+    # Create the arrays from the occupancy grid
+    def createCells(this, occupancyGrid):
+        numberOfCells = this.width * this.height
+
+        # Label the cells. If the occupancy grid is stored in an
+        # array, this is done in one go.
+        if (occupancyGrid.useArray == True):
+            obstructed = occupancyGrid.getBlockedArray().ravel()
+            codes = obstructed.astype('int8') * CellLabel.OBSTRUCTED.value
+            this.initialLabels = array('b', codes.tobytes())
+        else:
+            this.initialLabels = array('b', [0]) * numberOfCells
+            for y in range(this.height):
+                for x in range(this.width):
+                    if (occupancyGrid.getCell(x, y) > 0):
+                        this.initialLabels[y * this.width + x] = CellLabel.OBSTRUCTED.value
+        this.labels = array('b', this.initialLabels)
+
+        # Initially no cell has a parent and all path costs are infinite
+        this.parents = array('i', [-1]) * numberOfCells
+        this.pathCosts = array('d', [float("inf")]) * numberOfCells
+
+        # The generation in which each cell was last touched
+        this.generations = array('i', [0]) * numberOfCells
+
+    # Restore the cells touched since the last reset to their initial
+    # state, and start a new generation.
+    def resetTouchedCells(this):
+        for index in this.touchedCells:
+            this.labels[index] = this.initialLabels[index]
+            this.parents[index] = -1
+            this.pathCosts[index] = float("inf")
+        this.touchedCells = []
+        this.generation = this.generation + 1
+
+    def getCellFromCoords(this, coords):
+        return this.getCellFromIndex(coords[1] * this.width + coords[0])
+
+    def getCellFromIndex(this, index):
+        if (this.generations[index] != this.generation):
+            this.generations[index] = this.generation
+            this.touchedCells.append(index)
+        return CellView(this, index)
@@ -0,0 +1,116 @@
+from OccupancyGrid import OccupancyGrid, numpy
+from MappedOccupancyGrid import MappedOccupancyGrid
+from AStarPlanner import AStarPlanner
+from multiprocessing import Pool, cpu_count
+from multiprocessing.sharedctypes import RawArray
+from array import array
+
+# This module plans many (start, goal) queries on one map using a pool
+# of worker processes. Each worker builds one planner when it starts
+# and reuses it for all its queries, so the search grid is only set up
+# once per worker.
+#
+# The occupancy grid is copied once into shared memory. The workers
+# are forked with a reference to it, and (if NumPy is available) wrap
+# it in an OccupancyGrid without copying it, so the map is never
+# pickled for each task.
+#
+# A MappedOccupancyGrid (see MapLoader) whose cells have not been
+# converted is not copied at all: the workers inherit the grid itself
+# and read the memory mapped image, whose pages they share. Once
+# getDataArray has been called, or a cell has been changed, the grid
+# holds a private array of cells and is copied into shared memory like
+# any other grid. Either way, each worker's search grid is its own.
+#
+# Each path is returned as an array of flat cell indices
+# (y * width + x) from the start to the goal, or None if the goal
+# could not be reached.
+#
+# Example:
+#
+#   paths = planMany(occupancyGrid, [((3, 18), (20, 0)), ...], \
+#                    planner=AStarPlanner, plannerArguments=("diagonal",), workers=4)
+
+# The planner used by the worker process
+workerPlanner = None
+
+# Set up a worker. The occupancy grid is rebuilt around the shared
+# cells, unless the grid itself was shared, and a planner without
+# graphics is created for it.
+def initialiseWorker(sharedCells, width, height, resolution, plannerClass, plannerArguments):
+    global workerPlanner
+    if isinstance(sharedCells, OccupancyGrid):
+        occupancyGrid = sharedCells
+    elif (numpy is not None):
+        occupancyGrid = OccupancyGrid.fromBuffer(width, height, resolution, sharedCells)
+    else:
+        occupancyGrid = OccupancyGrid(width, height, resolution)
+        for y in range(height):
+            for x in range(width):
+                occupancyGrid.data[y][x] = sharedCells[y * width + x]
+    # HierarchicalPlanner never draws, so it has no headless
+    # constructor
+    createPlanner = getattr(plannerClass, "headless", plannerClass)
+    workerPlanner = createPlanner(occupancyGrid, *plannerArguments)
+    workerPlanner.printResults = False
+
+# Plan a single query in a worker and return the compact path
+def planQuery(query):
+    startCoords, goalCoords = query
+    if (workerPlanner.plan(startCoords, goalCoords) == False):
+        return None
+    width = workerPlanner.occupancyGrid.getWidth()
+    path = workerPlanner.extractPathToGoal()
+    return array('i', [cell.coords[1] * width + cell.coords[0] for cell in path.waypoints])
+
+# Copy the cells of an occupancy grid into shared memory. A memory
+# mapped grid which has not been converted is shared as it is.
+def createSharedCells(occupancyGrid):
+    if (isinstance(occupancyGrid, MappedOccupancyGrid) and (occupancyGrid.cells is None)):
+        return occupancyGrid
+    width = occupancyGrid.getWidth()
+    height = occupancyGrid.getHeight()
+    sharedCells = RawArray('B', width * height)
+    if (numpy is not None):
+        cells = numpy.frombuffer(sharedCells, dtype=numpy.uint8).reshape(height, width)
+        cells[:] = occupancyGrid.getBlockedArray()
+    else:
+        for y in range(height):
+            for x in range(width):
+                if (occupancyGrid.getCell(x, y) > 0):
+                    sharedCells[y * width + x] = 1
+    return sharedCells
+
+# Plan a path for each (startCoords, goalCoords) pair in queries. The
+# planner is given as a planner class, and plannerArguments are the
+# arguments its constructor takes after the occupancy grid. If workers
+# is None, one worker is used per CPU. With one worker, the queries
+# are planned in this process. The results are returned in the same
+# order as the queries.
+def planMany(occupancyGrid, queries, planner=AStarPlanner, plannerArguments=("diagonal",), \
+             workers=None, chunkSize=None):
+    queries = list(queries)
+    if (workers is None):
+        workers = cpu_count()
+
+    sharedCells = createSharedCells(occupancyGrid)
+    initialArguments = (sharedCells, occupancyGrid.getWidth(), occupancyGrid.getHeight(), \
+                        occupancyGrid.getResolution(), planner, tuple(plannerArguments))
+
+    if (workers <= 1):
+        initialiseWorker(*initialArguments)
+        return [planQuery(query) for query in queries]
+
+    # Hand out the queries in chunks, so that there are a few chunks
+    # per worker to balance the load.
+    if (chunkSize is None):
+        chunkSize = max(1, len(queries) // (workers * 4))
+
+    pool = Pool(workers, initialiseWorker, initialArguments)
+    try:
+        paths = pool.map(planQuery, queries, chunkSize)
+    finally:
+        pool.close()
+        pool.join()
+
+    return paths
@@ -1,4 +1,5 @@
 from PlannerBase import PlannerBase
+from PriorityQueue import PriorityQueue
 
 import math
 
@@ -6,23 +7,21 @@ class BestFirstPlanner(PlannerBase):
 
     def __init__(this, occupancyGrid):
         PlannerBase.__init__(this, occupancyGrid)
-        this.Queue = dict()
+        this.Queue = PriorityQueue()
 
     # Score is Euclidean Distance to goal. Smaller score = better.
-    # Add to dictionary with score as value
+    # Add to the priority queue with score as priority
     def pushCellOntoQueue(this, cell):
         score = cell.distanceToCell(this.goal)
-        this.Queue[cell] = score
+        this.Queue.push(cell, score)
     
     # Check the queue size is zero
     def isQueueEmpty(this):
-        return not this.Queue
+        return this.Queue.isEmpty()
 
     # Get cell with smallest score
     def popCellFromQueue(this):
-        cell = min(this.Queue, key=this.Queue.get)
-        del this.Queue[cell]
-        return cell
+        return this.Queue.pop()
 
     def resolveDuplicate(this, cell, parentCell):
         # Nothing to do in this case
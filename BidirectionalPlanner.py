@@ -0,0 +1,166 @@
+from PlannerBase import PlannerBase
+from PriorityQueue import PriorityQueue
+from Cell import CellLabel
+from Heuristics import getHeuristic, isHeuristicConsistent
+
+# This class implements a bidirectional search. Two searches are run
+# at the same time, one forwards from the start and one backwards from
+# the goal, and the path is found where they meet. For long queries
+# the two searches together cover much less of the map than a single
+# search.
+#
+# With the "zero" heuristic this is bidirectional Dijkstra. With the
+# "euclidean" or "diagonal" heuristics, or any other heuristic
+# registered as consistent, it is bidirectional A*, using
+# the average of the two heuristics as the potential for both
+# directions (Ikeda et al.). The potential is
+#
+#   p(v) = (h(v, goal) - h(v, start)) / 2
+#
+# The forward search orders cells by g_f(v) + p(v) and the backward
+# search by g_b(v) - p(v). This keeps the two searches consistent with
+# one another, and the search can stop as soon as the sum of the
+# smallest keys on the two queues is at least the length of the best
+# path found so far.
+
+class BidirectionalPlanner(PlannerBase):
+
+    def __init__(this, occupancyGrid, heuristic="zero"):
+        PlannerBase.__init__(this, occupancyGrid)
+        if (isHeuristicConsistent(heuristic) == False):
+            raise ValueError("The bidirectional planner needs a consistent heuristic, not " + str(heuristic))
+        this.Heuristic = heuristic
+        this.heuristicFunction = getHeuristic(heuristic)
+
+    # Estimate of the cost of the path between two cells
+    def heuristic(this, cell, targetCell):
+        h = this.heuristicFunction(cell.coords[0], cell.coords[1], \
+                                   targetCell.coords[0], targetCell.coords[1])
+        return h * this.costModel.heuristicScale
+
+    # The potential of a cell for the forward (0) or backward (1) search
+    def potential(this, cell, direction):
+        p = 0.5 * (this.heuristic(cell, this.goal) - this.heuristic(cell, this.start))
+        if (direction == 0):
+            return p
+        return -p
+
+    # Run both searches until they meet. The forward search state is
+    # stored in pathCosts[0] and parents[0] and the backward one in
+    # pathCosts[1] and parents[1]. On success, the parent pointers of
+    # the cells along the path are set so that extractPathToGoal
+    # works as for the other planners.
+    def plan(this, startCoords, goalCoords):
+
+        # Set up the search grid, the start and the goal
+        this.setUpSearch(startCoords, goalCoords)
+
+        this.numberOfCellsVisited = 0
+        this.goalReached = False
+
+        pathCosts = (dict(), dict())
+        parents = (dict(), dict())
+        queues = (PriorityQueue(), PriorityQueue())
+        dead = (set(), set())
+        stats = this.activeStats
+
+        for direction, cell in ((0, this.start), (1, this.goal)):
+            pathCosts[direction][cell] = 0
+            parents[direction][cell] = None
+            queues[direction].push(cell, this.potential(cell, direction))
+            if (stats is not None):
+                stats.recordPush()
+
+        # The length of the best path found so far and the cell where
+        # its two halves meet
+        bestPathCost = float("inf")
+        meetingCell = None
+        if (this.start == this.goal):
+            bestPathCost = 0
+            meetingCell = this.start
+
+        while ((queues[0].isEmpty() == False) and (queues[1].isEmpty() == False)):
+
+            # Stop once neither search can find a shorter path
+            if (queues[0].getTopPriority() + queues[1].getTopPriority() >= bestPathCost):
+                break
+
+            # Expand from the side with the smaller queue
+            if (len(queues[0]) <= len(queues[1])):
+                direction = 0
+            else:
+                direction = 1
+            queue = queues[direction]
+            costs = pathCosts[direction]
+            otherCosts = pathCosts[1 - direction]
+
+            cell = queue.pop()
+            if (stats is not None):
+                stats.recordPop()
+            dead[direction].add(cell)
+
+            for nextCell in this.getNextCellsToBeVisited(cell):
+                if nextCell in dead[direction]:
+                    continue
+                distance = costs[cell] + this.costModel.getEdgeCost(cell, nextCell)
+                if nextCell not in costs:
+                    this.numberOfCellsVisited = this.numberOfCellsVisited + 1
+                elif distance >= costs[nextCell]:
+                    continue
+                if (stats is not None):
+                    if nextCell in costs:
+                        stats.recordDuplicate()
+                    else:
+                        stats.recordPush()
+                costs[nextCell] = distance
+                parents[direction][nextCell] = cell
+
+                # As in the other planners, the cost is set before the
+                # label, so that it is the one recorded in a trace
+                if (nextCell.label == CellLabel.UNVISITED):
+                    nextCell.pathCost = distance
+                    this.setCellLabel(nextCell, CellLabel.ALIVE)
+                queue.push(nextCell, distance + this.potential(nextCell, direction))
+
+                # Check if this gives a shorter path through nextCell
+                if nextCell in otherCosts:
+                    pathCost = distance + otherCosts[nextCell]
+                    if (pathCost < bestPathCost):
+                        bestPathCost = pathCost
+                        meetingCell = nextCell
+
+            if (cell.label == CellLabel.ALIVE):
+                this.setCellLabel(cell, CellLabel.DEAD)
+
+            # Draw the update if required
+            if (this.showGraphicsEachIteration == True):
+                this.drawCurrentStateIfDue()
+
+        if (meetingCell is not None):
+            this.goalReached = True
+            this.joinPaths(meetingCell, pathCosts, parents)
+
+        # Draw the final results if required
+        this.drawCurrentState()
+
+        this.printResult()
+
+        return this.goalReached
+
+    # Set the parents and path costs of the cells on the path through
+    # meetingCell. The forward half is copied across; the backward
+    # half is reversed, so it points back towards the start.
+    def joinPaths(this, meetingCell, pathCosts, parents):
+        cell = meetingCell
+        while (cell is not None):
+            cell.parent = parents[0][cell]
+            cell.pathCost = pathCosts[0][cell]
+            cell = cell.parent
+
+        previousCell = meetingCell
+        cell = parents[1][meetingCell]
+        while (cell is not None):
+            cell.parent = previousCell
+            cell.pathCost = previousCell.pathCost + this.costModel.getEdgeCost(previousCell, cell)
+            previousCell = cell
+            cell = parents[1][cell]
@@ -21,6 +21,16 @@ class Cell(object):
         # Set coordinates
         this.coords = coords
 
+        # The search grid uses this to note which cells have been
+        # touched by the current search.
+        this.generation = 0
+
+        # Set the label, parent and path cost
+        this.reset(isOccupied)
+
+    # Put the cell back in the state it has before a search starts.
+    def reset(this, isOccupied):
+
         # Label the cell. If it is known to be obstructed, mark it as
         # such. Otherwise, assume it is free and mark as unvisited.
         if (isOccupied > 0):
@@ -0,0 +1,94 @@
+from SearchGrid import NEIGHBOUR_OFFSETS
+from Cell import Cell
+
+import math
+
+SQRT2 = math.sqrt(2)
+
+# This class gives the cost of moving between two cells, which the
+# cost-based planners (Dijkstra, A*, ARA*, JPS and the bidirectional
+# search) use for their path costs. The default model uses the
+# Euclidean distance between the cell centres, so that straight moves
+# cost 1 and diagonal moves cost sqrt(2), as before.
+#
+# The path costs stored in the cells are in the units of the cost
+# model. The lengths reported by PlannedPath are always worked out
+# from the cell coordinates, so they are in cells whatever the model.
+#
+# Heuristics return distances in cells. heuristicScale converts them
+# into the units of the cost model, and is chosen so that the scaled
+# heuristic never overestimates the cost.
+
+class CostModel(object):
+
+    def __init__(this):
+        this.heuristicScale = 1.0
+
+    # The cost of moving from cell to otherCell
+    def getEdgeCost(this, cell, otherCell):
+        return cell.distanceToCell(otherCell)
+
+    # The costs of the moves to the eight neighbours, in the order of
+    # NEIGHBOUR_OFFSETS
+    def getStepCosts(this):
+        origin = Cell((0, 0), 0)
+        return tuple(this.getEdgeCost(origin, Cell(offset, 0)) for offset in NEIGHBOUR_OFFSETS)
+
+    # A key which identifies the model, used to compare models and
+    # store paths in PathCache
+    def getKey(this):
+        return (type(this).__name__,)
+
+    def __eq__(this, other):
+        return isinstance(other, CostModel) and (this.getKey() == other.getKey())
+
+    def __ne__(this, other):
+        return not this.__eq__(other)
+
+    def __hash__(this):
+        return hash(this.getKey())
+
+# This class is a cost model for integer path costs. Straight moves cost
+# straightCost and diagonal moves cost diagonalCost, for example 10 and
+# 14, or 65536 and 92682 for 16 bit fixed point. The costs of the eight
+# moves are looked up in a table rather than computed with a square
+# root, and all the path costs are exact integers, so they do not
+# drift as they are added up and ties between paths are detected
+# exactly.
+#
+# Longer straight or diagonal edges (as used by jump point search)
+# cost the number of steps times the cost of a step.
+
+class OctileCostModel(CostModel):
+
+    def __init__(this, straightCost=10, diagonalCost=14):
+        this.straightCost = straightCost
+        this.diagonalCost = diagonalCost
+
+        # The cost of each of the eight moves, by the offset to the
+        # neighbour
+        this.stepCosts = dict()
+        for (offsetX, offsetY) in NEIGHBOUR_OFFSETS:
+            if ((offsetX != 0) and (offsetY != 0)):
+                this.stepCosts[(offsetX, offsetY)] = diagonalCost
+            else:
+                this.stepCosts[(offsetX, offsetY)] = straightCost
+
+        # A path of Euclidean length L costs at least L times the
+        # smaller of the cost per unit length of the two kinds of move
+        this.heuristicScale = min(straightCost, diagonalCost / SQRT2)
+
+    def getEdgeCost(this, cell, otherCell):
+        offsetX = otherCell.coords[0] - cell.coords[0]
+        offsetY = otherCell.coords[1] - cell.coords[1]
+        cost = this.stepCosts.get((offsetX, offsetY))
+        if (cost is None):
+            offsetX = abs(offsetX)
+            offsetY = abs(offsetY)
+            diagonalSteps = min(offsetX, offsetY)
+            cost = diagonalSteps * this.diagonalCost + \
+                (max(offsetX, offsetY) - diagonalSteps) * this.straightCost
+        return cost
+
+    def getKey(this):
+        return (type(this).__name__, this.straightCost, this.diagonalCost)
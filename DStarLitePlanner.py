@@ -0,0 +1,280 @@
+from PlannerBase import PlannerBase
+from PriorityQueue import PriorityQueue
+from PlannedPath import PlannedPath
+from SearchGrid import NEIGHBOUR_OFFSETS
+from Cell import Cell, CellLabel
+
+# This class implements D* Lite (Koenig and Likhachev, 2002), an
+# incremental planner. The other planners start again from scratch for
+# every query. D* Lite keeps its search state between calls, so when a
+# few cells of the occupancy grid change it only repairs the part of
+# the search which depends on them.
+#
+# The search runs backwards from the goal. Each cell s has two values:
+# g(s), the current estimate of its distance to the goal, and rhs(s),
+# a one-step lookahead computed from the g values of its neighbours.
+# Cells where the two differ are "inconsistent" and are kept on a
+# priority queue. ComputeShortestPath processes them until the start
+# is consistent, after which the path can be read off by following
+# the smallest g values.
+#
+# Typical use:
+#
+#   planner.plan(startCoords, goalCoords)
+#   path = planner.extractPathToGoal()
+#   occupancyGrid.setCell(x, y, 1)
+#   path = planner.updateCells([(x, y)])
+#
+# updateCells can also be given a new start, if the robot has moved.
+# The occupancy grid is read directly, so the changed cells have to be
+# set in the occupancy grid before updateCells is called.
+#
+# The costs of straight and diagonal moves come from the cost model of
+# the planner. With the default model they are 1 and sqrt(2), and
+# sums of them which should be equal can differ in the last bit. Keys
+# are therefore compared with a small tolerance (see keyIsLess), so
+# that such ties are still broken by the second part of the key. With
+# an integer model, such as OctileCostModel, the costs are exact.
+
+class DStarLitePlanner(PlannerBase):
+
+    def __init__(this, occupancyGrid):
+        PlannerBase.__init__(this, occupancyGrid)
+        this.Queue = PriorityQueue()
+        this.g = dict()
+        this.rhs = dict()
+        this.km = 0
+        this.startCoords = None
+        this.goalCoords = None
+        this.straightCost = 1
+        this.diagonalCost = 1
+
+    # Look up the costs of a straight and a diagonal move in the cost
+    # model
+    def setStepCosts(this):
+        origin = Cell((0, 0), 0)
+        this.straightCost = this.costModel.getEdgeCost(origin, Cell((1, 0), 0))
+        this.diagonalCost = this.costModel.getEdgeCost(origin, Cell((1, 1), 0))
+
+    # Octile distance between two cells, in the units of the cost
+    # model. This is consistent, as D* Lite requires. A diagonal move
+    # is never worth more than two straight ones.
+    def heuristic(this, coords, otherCoords):
+        x = abs(coords[0]-otherCoords[0])
+        y = abs(coords[1]-otherCoords[1])
+        diagonalSteps = min(x, y)
+        return diagonalSteps * min(this.diagonalCost, 2 * this.straightCost) + \
+            (max(x, y) - diagonalSteps) * this.straightCost
+
+    def isFree(this, coords):
+        return (this.occupancyGrid.getCell(coords[0], coords[1]) <= 0)
+
+    # The neighbours of a cell which are inside the grid. Obstructed
+    # cells are included; moving into them has an infinite cost.
+    def getNeighbours(this, coords):
+        neighbours = list()
+        for (offsetX, offsetY) in NEIGHBOUR_OFFSETS:
+            x = coords[0] + offsetX
+            y = coords[1] + offsetY
+            if ((x >= 0) and (x < this.occupancyGrid.getWidth()) and \
+                (y >= 0) and (y < this.occupancyGrid.getHeight())):
+                neighbours.append((x, y))
+        return neighbours
+
+    # The cost of moving between two neighbouring cells
+    def cost(this, coords, otherCoords):
+        if ((this.isFree(coords) == False) or (this.isFree(otherCoords) == False)):
+            return float("inf")
+        if ((coords[0] != otherCoords[0]) and (coords[1] != otherCoords[1])):
+            return this.diagonalCost
+        return this.straightCost
+
+    def calculateKey(this, coords):
+        value = min(this.g.get(coords, float("inf")), this.rhs.get(coords, float("inf")))
+        return (value + this.heuristic(this.startCoords, coords) + this.km, value)
+
+    # Recompute rhs for a cell from its neighbours
+    def computeRhs(this, coords):
+        rhs = float("inf")
+        g = this.g
+        for neighbour in this.getNeighbours(coords):
+            rhs = min(rhs, this.cost(coords, neighbour) + g.get(neighbour, float("inf")))
+        return rhs
+
+    # Put the cell on the queue if it is inconsistent, and take it off
+    # if it is consistent.
+    # If the instrumentation is enabled, changing the key of a cell
+    # which is already on the queue counts as a duplicate.
+    def updateVertex(this, coords):
+        stats = this.activeStats
+        if (this.g.get(coords, float("inf")) != this.rhs.get(coords, float("inf"))):
+            if (stats is not None):
+                if coords in this.Queue:
+                    stats.recordDuplicate()
+                else:
+                    stats.recordPush()
+            this.Queue.push(coords, this.calculateKey(coords))
+        elif coords in this.Queue:
+            this.Queue.remove(coords)
+            if (stats is not None):
+                stats.recordPop()
+
+    # Process inconsistent cells until the start is consistent and no
+    # cell on the queue could give a shorter path to it.
+    def computeShortestPath(this):
+        g = this.g
+        rhs = this.rhs
+        queue = this.Queue
+        inf = float("inf")
+        while ((queue.isEmpty() == False) and \
+               (keyIsLess(queue.getTopPriority(), this.calculateKey(this.startCoords)) or \
+                (rhs.get(this.startCoords, inf) != g.get(this.startCoords, inf)))):
+            coords = queue.peek()
+            oldKey = queue.getTopPriority()
+            newKey = this.calculateKey(coords)
+            if (oldKey < newKey):
+                queue.push(coords, newKey)
+                if (this.activeStats is not None):
+                    this.activeStats.recordDuplicate()
+                continue
+
+            this.numberOfCellsVisited = this.numberOfCellsVisited + 1
+            if (g.get(coords, inf) > rhs.get(coords, inf)):
+                # Overconsistent: the cell has got closer to the goal
+                g[coords] = rhs[coords]
+                queue.remove(coords)
+                if (this.activeStats is not None):
+                    this.activeStats.recordPop()
+                for neighbour in this.getNeighbours(coords):
+                    if (neighbour != this.goalCoords):
+                        rhs[neighbour] = min(rhs.get(neighbour, inf), \
+                                             this.cost(neighbour, coords) + g[coords])
+                        this.updateVertex(neighbour)
+            else:
+                # Underconsistent: the cell has got further away
+                oldG = g.get(coords, inf)
+                g[coords] = inf
+                for neighbour in this.getNeighbours(coords) + [coords]:
+                    if ((neighbour != this.goalCoords) and \
+                        (rhs.get(neighbour, inf) == this.cost(neighbour, coords) + oldG)):
+                        rhs[neighbour] = this.computeRhs(neighbour)
+                    this.updateVertex(neighbour)
+
+            # The search grid is only labelled if it is being drawn or
+            # traced. As in the other planners, the cost is set before
+            # the label, so that it is the one recorded in the trace.
+            if ((this.showGraphics == True) or (this.trace is not None)):
+                cell = this.searchGrid.getCellFromCoords(coords)
+                if (cell.label == CellLabel.UNVISITED):
+                    cell.pathCost = g[coords]
+                    this.setCellLabel(cell, CellLabel.DEAD)
+                if (this.showGraphicsEachIteration == True):
+                    this.drawCurrentStateIfDue()
+
+    # Plan from scratch. This throws away any previous search state.
+    def plan(this, startCoords, goalCoords):
+
+        # Set up the search grid, the start and the goal
+        this.setUpSearch(startCoords, goalCoords)
+
+        this.Queue.clear()
+        this.g = dict()
+        this.rhs = dict()
+        this.km = 0
+        this.startCoords = tuple(startCoords)
+        this.goalCoords = tuple(goalCoords)
+        this.numberOfCellsVisited = 0
+        this.setStepCosts()
+
+        this.rhs[this.goalCoords] = 0
+        this.updateVertex(this.goalCoords)
+        this.computeShortestPath()
+
+        return this.finishSearch()
+
+    # Repair the search after the cells in changedCells have changed
+    # in the occupancy grid, and return the new path. If startCoords
+    # is given, the start is moved there first.
+    def updateCells(this, changedCells, startCoords=None):
+        this.numberOfCellsVisited = 0
+
+        if (startCoords is not None):
+            this.km = this.km + this.heuristic(this.startCoords, startCoords)
+            this.startCoords = tuple(startCoords)
+
+        # The costs of all the moves into and out of each changed
+        # cell may have changed, so rhs is recomputed for the cell
+        # and its neighbours.
+        for changedCoords in changedCells:
+            changedCoords = tuple(changedCoords)
+            for coords in this.getNeighbours(changedCoords) + [changedCoords]:
+                if (coords != this.goalCoords):
+                    this.rhs[coords] = this.computeRhs(coords)
+                this.updateVertex(coords)
+
+        # The search grid only needs updating if it is being drawn or
+        # traced
+        if ((this.showGraphics == True) or (this.trace is not None)):
+            this.setUpSearch(this.startCoords, this.goalCoords)
+
+        this.computeShortestPath()
+        this.finishSearch()
+
+        return this.extractPathToGoal()
+
+    # The search can stop with g(start) still larger than rhs(start),
+    # so rhs is used to decide whether there is a path.
+    def finishSearch(this):
+        this.goalReached = (this.rhs.get(this.startCoords, float("inf")) < float("inf"))
+
+        # Draw the final results if required
+        this.drawCurrentState()
+
+        this.printResult()
+
+        return this.goalReached
+
+    # Extract the path by starting at the start and repeatedly moving
+    # to the neighbour with the smallest cost plus g value. The cells
+    # in the path are created directly rather than taken from the
+    # search grid, so that the search grid does not have to be rebuilt
+    # after each change. If the g values lead back to a cell already
+    # on the path, they are not consistent and the extraction fails.
+    # goalReached is set from the extracted path.
+    def extractPathToGoal(this):
+        path = PlannedPath()
+        path.goalReached = this.goalReached
+
+        coords = this.startCoords
+        path.waypoints.append(Cell(coords, 0))
+        if (this.goalReached == True):
+            inf = float("inf")
+            visited = set([coords])
+            while (coords != this.goalCoords):
+                bestCost = inf
+                bestCoords = None
+                for neighbour in this.getNeighbours(coords):
+                    cost = this.cost(coords, neighbour) + this.g.get(neighbour, inf)
+                    if (cost < bestCost):
+                        bestCost = cost
+                        bestCoords = neighbour
+                if ((bestCoords is None) or (bestCoords in visited)):
+                    path.goalReached = False
+                    break
+                coords = bestCoords
+                visited.add(coords)
+                path.waypoints.append(Cell(coords, 0))
+        this.goalReached = path.goalReached
+
+        # Now draw the path
+        this.drawPath(path)
+
+        return path
+
+# Compare two keys. The first parts are taken to be equal if they
+# differ only by rounding, in which case the second parts decide.
+def keyIsLess(key, otherKey):
+    tolerance = 1e-9 * max(1.0, min(abs(key[0]), abs(otherKey[0])))
+    if (abs(key[0] - otherKey[0]) > tolerance):
+        return key[0] < otherKey[0]
+    return key[1] < otherKey[1] - tolerance
@@ -1,38 +1,127 @@
 from PlannerBase import PlannerBase
+from PriorityQueue import PriorityQueue
 from Cell import CellLabel
+from SearchGrid import NEIGHBOUR_OFFSETS, NEIGHBOUR_OFFSETS_FROM_MASK
+from DistanceField import computeDistanceField
 
-import math
+# If useCostToGoField is True, the planner works in a different
+# mode. Rather than searching from the start to the goal, it computes
+# the cost-to-go field: the distance from every cell to the goal. The
+# path from any start is then found by repeatedly stepping to the
+# neighbour which is closest to the goal. The field is kept until the
+# goal, the occupancy grid or the cost model changes, so repeated
+# queries to the same goal only cost as much as the length of the
+# path. The costs of the moves come from the cost model, both in the
+# field and in the walk, so the path is the shortest under the model.
 
 class DijkstraPlanner(PlannerBase):
 
-    def __init__(this, occupancyGrid):
+    def __init__(this, occupancyGrid, useCostToGoField=False):
         PlannerBase.__init__(this, occupancyGrid)
-        this.Queue = dict()
+        this.Queue = PriorityQueue()
+        this.useCostToGoField = useCostToGoField
+        this.costToGoField = None
+        this.costToGoGoalCoords = None
+        this.costToGoOccupancyGridVersion = None
+        this.costToGoCostModel = None
 
     # Path Cost is Euclidean Distance. Smaller score = better.
-    # Add to dictionary with score as value
+    # Add to the priority queue with score as priority
     def pushCellOntoQueue(this, cell):
         if cell.parent:
-            cell.pathCost = cell.parent.pathCost + cell.distanceToCell(cell.parent)
-        this.Queue[cell] = cell.pathCost
+            cell.pathCost = cell.parent.pathCost + this.costModel.getEdgeCost(cell.parent, cell)
+        this.Queue.push(cell, cell.pathCost)
     
     # Check the queue size is zero
     def isQueueEmpty(this):
-        return not this.Queue
+        return this.Queue.isEmpty()
 
     # Get cell with smallest score
     def popCellFromQueue(this):
-        cell = min(this.Queue, key=this.Queue.get)
-        del this.Queue[cell]
-        return cell
+        return this.Queue.pop()
 
 
     # If cell is alive, check for more efficient path
     def resolveDuplicate(this, cell, parentCell):
         if cell.label != CellLabel.DEAD:
-            distance = parentCell.pathCost + cell.distanceToCell(parentCell)
+            distance = parentCell.pathCost + this.costModel.getEdgeCost(parentCell, cell)
             if distance < cell.pathCost:
                 cell.pathCost = distance
                 cell.parent = parentCell
-                this.Queue[cell] = distance
-            
+                this.Queue.push(cell, distance)
+
+    # Plan using either the normal search or the cost-to-go field
+    def plan(this, startCoords, goalCoords):
+        if (this.useCostToGoField == False):
+            return PlannerBase.plan(this, startCoords, goalCoords)
+
+        # Set up the search grid, the start and the goal
+        this.setUpSearch(startCoords, goalCoords)
+
+        # Compute the field if it is out of date
+        this.numberOfCellsVisited = 0
+        if ((goalCoords != this.costToGoGoalCoords) or \
+            (this.occupancyGrid.version != this.costToGoOccupancyGridVersion) or \
+            (this.costModel != this.costToGoCostModel)):
+            this.computeCostToGoField(goalCoords)
+
+        this.goalReached = this.followCostToGoField()
+
+        # Draw the final results if required
+        this.drawCurrentState()
+
+        this.printResult()
+
+        return this.goalReached
+
+    # Compute the distance from every cell to the goal. The search
+    # grid has to be up to date with the occupancy grid.
+    def computeCostToGoField(this, goalCoords):
+        this.costToGoField, this.numberOfCellsVisited = \
+            computeDistanceField(this.searchGrid, goalCoords, this.costModel.getStepCosts())
+        this.costToGoGoalCoords = goalCoords
+        this.costToGoOccupancyGridVersion = this.occupancyGrid.version
+        this.costToGoCostModel = this.costModel
+
+    # Walk from the start down the cost-to-go field to the goal,
+    # setting the parent of each cell along the way, so the path can
+    # be extracted with extractPathToGoal. Each step goes to the
+    # neighbour with the smallest sum of its cost-to-go and the cost
+    # of the step.
+    def followCostToGoField(this):
+        field = this.costToGoField
+        searchGrid = this.searchGrid
+        width = searchGrid.width
+        stepCosts = dict(zip(NEIGHBOUR_OFFSETS, this.costModel.getStepCosts()))
+
+        cell = this.start
+        cost = field[cell.coords[1] * width + cell.coords[0]]
+        if (cost == float("inf")):
+            return False
+
+        while (cell != this.goal):
+            x = cell.coords[0]
+            y = cell.coords[1]
+            bestCost = float("inf")
+            bestCoords = None
+            for (offsetX, offsetY) in NEIGHBOUR_OFFSETS_FROM_MASK[searchGrid.neighbourMasks[y * width + x]]:
+                newX = x + offsetX
+                newY = y + offsetY
+                stepCost = field[newY * width + newX] + stepCosts[(offsetX, offsetY)]
+                if (stepCost < bestCost):
+                    bestCost = stepCost
+                    bestCoords = (newX, newY)
+
+            # Every step has to get closer to the goal. This can only
+            # fail if the field does not match the grid.
+            nextCost = field[bestCoords[1] * width + bestCoords[0]]
+            if (nextCost >= cost):
+                return False
+
+            nextCell = searchGrid.getCellFromCoords(bestCoords)
+            nextCell.parent = cell
+            nextCell.pathCost = cell.pathCost + this.costModel.getEdgeCost(cell, nextCell)
+            cell = nextCell
+            cost = nextCost
+
+        return True
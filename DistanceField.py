@@ -0,0 +1,58 @@
+from SearchGrid import NEIGHBOUR_OFFSETS
+from array import array
+
+import heapq
+import math
+
+# Functions for computing the distance from one cell to every other
+# cell of a search grid (a one-to-all Dijkstra search). The result is
+# stored compactly as a flat array of 32 bit floats, indexed by
+# y * width + x. Cells which cannot be reached have an infinite
+# distance. The moves are the same as for the planners: eight
+# neighbours, by default with a cost of 1 for straight moves and
+# sqrt(2) for diagonal ones. Other costs, such as those of a cost
+# model (see CostModel.getStepCosts), can be given instead.
+
+SQRT2 = math.sqrt(2)
+
+# The length of the step to each neighbour, in the order of
+# NEIGHBOUR_OFFSETS
+STEP_LENGTHS = tuple(SQRT2 if (offsetX != 0) and (offsetY != 0) else 1.0 \
+                     for (offsetX, offsetY) in NEIGHBOUR_OFFSETS)
+
+# Compute the distance from sourceCoords to every cell of the search
+# grid, where stepLengths gives the cost of the move to each neighbour
+# in the order of NEIGHBOUR_OFFSETS. Returns the distance array and
+# the number of cells settled.
+def computeDistanceField(searchGrid, sourceCoords, stepLengths=STEP_LENGTHS):
+    width = searchGrid.width
+    numberOfCells = width * searchGrid.height
+    masks = searchGrid.neighbourMasks
+
+    # For each neighbour mask, the changes in the flat index and the
+    # step lengths of the neighbours which are free
+    indexOffsets = [offsetY * width + offsetX for (offsetX, offsetY) in NEIGHBOUR_OFFSETS]
+    neighbours = [[(indexOffsets[i], stepLengths[i]) for i in range(8) if (mask & (1 << i))] \
+                  for mask in range(256)]
+
+    distances = array('d', [float("inf")]) * numberOfCells
+    done = bytearray(numberOfCells)
+    numberOfCellsSettled = 0
+
+    source = sourceCoords[1] * width + sourceCoords[0]
+    distances[source] = 0
+    heap = [(0.0, source)]
+    while heap:
+        distance, index = heapq.heappop(heap)
+        if done[index]:
+            continue
+        done[index] = 1
+        numberOfCellsSettled = numberOfCellsSettled + 1
+        for (indexOffset, stepLength) in neighbours[masks[index]]:
+            nextIndex = index + indexOffset
+            nextDistance = distance + stepLength
+            if (nextDistance < distances[nextIndex]):
+                distances[nextIndex] = nextDistance
+                heapq.heappush(heap, (nextDistance, nextIndex))
+
+    return array('f', distances), numberOfCellsSettled
@@ -4,6 +4,15 @@ from Cell import CellLabel
 #import pyscreenshot as ImageGrab
 import random
 
+# The colour used to draw each label. Any other label (ALIVE) is white.
+CELL_COLOURS = {
+    CellLabel.OBSTRUCTED: 'purple',
+    CellLabel.START: 'green',
+    CellLabel.GOAL: 'blue',
+    CellLabel.UNVISITED: 'gray',
+    CellLabel.DEAD: 'black',
+}
+
 class GridDrawer(object):
 
     def __init__(this, searchGrid):
@@ -28,28 +37,19 @@ class GridDrawer(object):
             for j in range(height):
                 this.rectangles[j][i].draw(this.win)
                 
-    def update(this):
+    # Redraw the cells. If changedCells is given, only the cells with
+    # those coordinates are redrawn; otherwise every cell is.
+    def update(this, changedCells=None):
 
-        ### Figure out the width and height
-        width = this.searchGrid.getWidth();
-        height = this.searchGrid.getHeight();
+        if (changedCells is None):
+            ### Figure out the width and height
+            width = this.searchGrid.getWidth();
+            height = this.searchGrid.getHeight();
+            changedCells = [(i, j) for i in range(width) for j in range(height)]
 
-        for i in range(width):
-            for j in range(height):
-                cellLabel = this.searchGrid.getCellFromCoords((i, j)).label
-                if cellLabel == CellLabel.OBSTRUCTED:
-                    color = 'purple'
-                elif cellLabel == CellLabel.START:
-                    color = 'green'
-                elif cellLabel == CellLabel.GOAL:
-                    color = 'blue'
-                elif cellLabel == CellLabel.UNVISITED:
-                    color = 'gray'
-                elif cellLabel == CellLabel.DEAD:
-                    color = 'black'
-                else:
-                    color = 'white'
-                this.rectangles[j][i].setFill(color);
+        for (i, j) in changedCells:
+            cellLabel = this.searchGrid.getCellFromCoords((i, j)).label
+            this.rectangles[j][i].setFill(CELL_COLOURS.get(cellLabel, 'white'));
 
         # Flush the drawing right at the very end for speed
         this.win.flush()
@@ -0,0 +1,127 @@
+from array import array
+
+import math
+
+# NumPy is optional. It is only used to compute heuristic fields in
+# one vectorized operation.
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# This module holds the heuristics used by the planners. A heuristic
+# is a function h(x, y, goalX, goalY) which estimates the length of
+# the path from cell (x, y) to the goal. The heuristics are stored in
+# a registry under a name, so planners can be given either the name
+# of a heuristic or the function itself, and new heuristics can be
+# added with registerHeuristic:
+#
+#   def chebyshev(x, y, goalX, goalY):
+#       return max(abs(x - goalX), abs(y - goalY))
+#
+#   registerHeuristic("chebyshev", chebyshev, isConsistent=True)
+#   planner = AStarPlanner(occupancyGrid, "chebyshev")
+#
+# A heuristic can also be given a vectorized version, which takes
+# NumPy arrays of x and y coordinates and returns an array of
+# values. This is used by computeHeuristicField to work out the
+# heuristic for every cell of the map at once.
+#
+# A heuristic is consistent if it never drops by more than the cost of
+# a move. Some planners (bidirectional search, ARA*) need this.
+
+SQRT2 = math.sqrt(2)
+
+# The registered heuristics. Each entry maps the name to a tuple of the
+# function, the vectorized function (or None) and whether the
+# heuristic is consistent.
+HEURISTICS = dict()
+
+def zeroHeuristic(x, y, goalX, goalY):
+    return 0
+
+def euclideanHeuristic(x, y, goalX, goalY):
+    dx = x - goalX
+    dy = y - goalY
+    return math.sqrt(dx*dx + dy*dy)
+
+def manhattanHeuristic(x, y, goalX, goalY):
+    return abs(x - goalX) + abs(y - goalY)
+
+# The octile distance: the length of the shortest path on an empty
+# map with straight and diagonal moves
+def diagonalHeuristic(x, y, goalX, goalY):
+    dx = abs(x - goalX)
+    dy = abs(y - goalY)
+    return (dx+dy) + (SQRT2 - 2)*min(dx,dy)
+
+def zeroHeuristicVectorized(x, y, goalX, goalY):
+    return numpy.zeros(numpy.shape(x))
+
+def euclideanHeuristicVectorized(x, y, goalX, goalY):
+    return numpy.hypot(x - goalX, y - goalY)
+
+def manhattanHeuristicVectorized(x, y, goalX, goalY):
+    return numpy.abs(x - goalX) + numpy.abs(y - goalY)
+
+def diagonalHeuristicVectorized(x, y, goalX, goalY):
+    dx = numpy.abs(x - goalX)
+    dy = numpy.abs(y - goalY)
+    return (dx+dy) + (SQRT2 - 2)*numpy.minimum(dx,dy)
+
+# Add a heuristic to the registry, replacing any heuristic with the
+# same name
+def registerHeuristic(name, function, vectorizedFunction=None, isConsistent=False):
+    HEURISTICS[name] = (function, vectorizedFunction, isConsistent)
+
+# Return the registry entry for a heuristic, given as a registered
+# name or as a function. Returns None for a function which has not
+# been registered.
+def getHeuristicEntry(heuristic):
+    if callable(heuristic):
+        for entry in HEURISTICS.values():
+            if (heuristic is entry[0]):
+                return entry
+        return None
+    if heuristic not in HEURISTICS:
+        raise ValueError("Unknown heuristic " + str(heuristic))
+    return HEURISTICS[heuristic]
+
+# Return the function for a heuristic. The heuristic can be given as
+# a registered name or as a function, which is returned unchanged.
+def getHeuristic(heuristic):
+    if callable(heuristic):
+        return heuristic
+    return getHeuristicEntry(heuristic)[0]
+
+# Check whether a heuristic is known to be consistent. Functions
+# which have not been registered are assumed not to be.
+def isHeuristicConsistent(heuristic):
+    entry = getHeuristicEntry(heuristic)
+    return (entry is not None) and entry[2]
+
+# Compute the heuristic from every cell of a width x height map to
+# goalCoords, multiplied by scale. The values are returned in a flat
+# array indexed by y * width + x. The vectorized version of the
+# heuristic is used if there is one and NumPy is available; otherwise
+# the heuristic is called for each cell.
+def computeHeuristicField(heuristic, width, height, goalCoords, scale=1.0):
+    function = getHeuristic(heuristic)
+    entry = getHeuristicEntry(heuristic)
+    goalX = goalCoords[0]
+    goalY = goalCoords[1]
+
+    if ((entry is not None) and (entry[1] is not None) and (numpy is not None)):
+        y, x = numpy.mgrid[0:height, 0:width]
+        field = entry[1](x, y, goalX, goalY) * scale
+        # Copy the values across as bytes, rather than making a Python
+        # float for each cell
+        return array('d', numpy.ascontiguousarray(field, dtype=numpy.float64).tostring())
+
+    return array('d', [function(x, y, goalX, goalY) * scale \
+                       for y in range(height) for x in range(width)])
+
+registerHeuristic("zero", zeroHeuristic, zeroHeuristicVectorized, isConsistent=True)
+registerHeuristic("euclidean", euclideanHeuristic, euclideanHeuristicVectorized, isConsistent=True)
+registerHeuristic("manhattan", manhattanHeuristic, manhattanHeuristicVectorized, isConsistent=False)
+registerHeuristic("diagonal", diagonalHeuristic, diagonalHeuristicVectorized, isConsistent=True)
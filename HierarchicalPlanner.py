@@ -0,0 +1,355 @@
+from AStarPlanner import AStarPlanner
+from PriorityQueue import PriorityQueue
+from PlannedPath import PlannedPath
+from SearchGrid import NEIGHBOUR_OFFSETS
+
+import heapq
+import math
+
+SQRT2 = math.sqrt(2)
+
+# The neighbour offsets, each with the length of the step
+NEIGHBOUR_STEPS = tuple((offsetX, offsetY, SQRT2 if (offsetX != 0) and (offsetY != 0) else 1) \
+                        for (offsetX, offsetY) in NEIGHBOUR_OFFSETS)
+
+# This class implements hierarchical path-finding (HPA*, Botea, Mueller
+# and Schaeffer, 2004). It is meant for maps which stay the same for a
+# long time while many queries are answered.
+#
+# The occupancy grid is divided into square clusters. Wherever two
+# neighbouring clusters share a run of free cells along their border,
+# one or two "entrances" are created. Each entrance adds a node on
+# both sides of the border. The distances between the nodes within
+# each cluster are computed once and stored. Together, these form a
+# small abstract graph.
+#
+# A query adds the start and the goal to the abstract graph, finds the
+# shortest abstract path, and then refines each step of it into cells
+# using an ordinary planner (by default A* with the diagonal
+# heuristic). Each refinement step is short, so it is fast.
+#
+# The abstract graph is tied to the occupancy grid. When a cell is
+# changed through setCell, only the cluster containing it and its
+# neighbours are rebuilt, the next time a query is made. The paths are
+# not guaranteed to be optimal, since they have to pass through the
+# entrances. If the abstract graph does not connect the start and the
+# goal, the planner falls back to a search over the whole grid.
+
+class HierarchicalPlanner(object):
+
+    # Runs of free border cells at least this long get two entrances,
+    # one at each end. Shorter runs get one entrance in the middle.
+    MAXIMUM_ENTRANCE_WIDTH = 6
+
+    def __init__(this, occupancyGrid, clusterSize=16, refinementPlanner=None):
+        this.occupancyGrid = occupancyGrid
+        this.clusterSize = clusterSize
+        this.numberOfClustersX = (occupancyGrid.getWidth() + clusterSize - 1) // clusterSize
+        this.numberOfClustersY = (occupancyGrid.getHeight() + clusterSize - 1) // clusterSize
+
+        # The planner used to turn the abstract path into cells
+        if (refinementPlanner is None):
+            refinementPlanner = AStarPlanner.headless(occupancyGrid, "diagonal")
+        this.refinementPlanner = refinementPlanner
+        this.refinementPlanner.printResults = False
+
+        # The abstract graph. entrances maps each border, given as
+        # (cluster, (offsetX, offsetY)) for the border with the
+        # cluster to the east or north, to the list of entrances
+        # across it. clusterNodes gives the nodes in each cluster and
+        # intraEdges the distances between them.
+        this.entrances = dict()
+        this.clusterNodes = dict()
+        this.intraEdges = dict()
+        this.interEdges = dict()
+
+        # The clusters which have to be rebuilt before the next query
+        this.dirtyClusters = set()
+        this.needsRebuild = True
+        occupancyGrid.addChangeListener(this.cellChanged)
+
+        this.goalReached = None
+        this.path = None
+        this.abstractPath = None
+        this.numberOfCellsVisited = 0
+
+    # Called by the occupancy grid when a cell changes
+    def cellChanged(this, x, y):
+        if (x is None):
+            this.needsRebuild = True
+        else:
+            this.dirtyClusters.add(this.getClusterFromCoords((x, y)))
+
+    # Stop following changes to the occupancy grid
+    def detach(this):
+        this.occupancyGrid.removeChangeListener(this.cellChanged)
+
+    def getClusterFromCoords(this, coords):
+        return (coords[0] // this.clusterSize, coords[1] // this.clusterSize)
+
+    # The neighbouring clusters of a cluster, within the grid
+    def getNeighbouringClusters(this, cluster):
+        clusters = list()
+        for (offsetX, offsetY) in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+            clusterX = cluster[0] + offsetX
+            clusterY = cluster[1] + offsetY
+            if ((clusterX >= 0) and (clusterX < this.numberOfClustersX) and \
+                (clusterY >= 0) and (clusterY < this.numberOfClustersY)):
+                clusters.append((clusterX, clusterY))
+        return clusters
+
+    def isFree(this, x, y):
+        return (x >= 0) and (x < this.occupancyGrid.getWidth()) and (y >= 0) \
+            and (y < this.occupancyGrid.getHeight()) and (this.occupancyGrid.getCell(x, y) <= 0)
+
+    # Bring the abstract graph up to date with the occupancy grid
+    def updateAbstractGraph(this):
+        if (this.needsRebuild == True):
+            this.entrances = dict()
+            this.clusterNodes = dict()
+            this.intraEdges = dict()
+            clusters = [(x, y) for x in range(this.numberOfClustersX) for y in range(this.numberOfClustersY)]
+            for cluster in clusters:
+                this.createEntrances(cluster, (1, 0))
+                this.createEntrances(cluster, (0, 1))
+            for cluster in clusters:
+                this.createIntraEdges(cluster)
+            this.createInterEdges()
+            this.needsRebuild = False
+            this.dirtyClusters.clear()
+            return
+
+        if not this.dirtyClusters:
+            return
+
+        # Rebuild the borders of the changed clusters. This can change
+        # the nodes of the neighbouring clusters too, so their edges
+        # are rebuilt as well.
+        affectedClusters = set()
+        for cluster in this.dirtyClusters:
+            affectedClusters.add(cluster)
+            for neighbour in this.getNeighbouringClusters(cluster):
+                affectedClusters.add(neighbour)
+                if ((neighbour[0] > cluster[0]) or (neighbour[1] > cluster[1])):
+                    this.createEntrances(cluster, (neighbour[0] - cluster[0], neighbour[1] - cluster[1]))
+                else:
+                    this.createEntrances(neighbour, (cluster[0] - neighbour[0], cluster[1] - neighbour[1]))
+        for cluster in affectedClusters:
+            this.createIntraEdges(cluster)
+        this.createInterEdges()
+        this.dirtyClusters.clear()
+
+    # Find the entrances on the border between a cluster and the
+    # cluster to the east (offset (1, 0)) or north (offset (0, 1)).
+    # Each entrance is a pair of cells, one on each side.
+    def createEntrances(this, cluster, offset):
+        border = (cluster, offset)
+        this.entrances[border] = list()
+        if ((cluster[0] + offset[0] >= this.numberOfClustersX) or \
+            (cluster[1] + offset[1] >= this.numberOfClustersY)):
+            return
+
+        # The cells along the border, on the side of the first cluster
+        size = this.clusterSize
+        if (offset[0] == 1):
+            x = (cluster[0] + 1) * size - 1
+            cells = [(x, y) for y in range(cluster[1] * size, \
+                                           min((cluster[1] + 1) * size, this.occupancyGrid.getHeight()))]
+        else:
+            y = (cluster[1] + 1) * size - 1
+            cells = [(x, y) for x in range(cluster[0] * size, \
+                                           min((cluster[0] + 1) * size, this.occupancyGrid.getWidth()))]
+
+        # Split the border into runs where both sides are free
+        runs = list()
+        run = list()
+        for (x, y) in cells:
+            if (this.isFree(x, y) and this.isFree(x + offset[0], y + offset[1])):
+                run.append((x, y))
+            elif run:
+                runs.append(run)
+                run = list()
+        if run:
+            runs.append(run)
+
+        for run in runs:
+            if (len(run) < HierarchicalPlanner.MAXIMUM_ENTRANCE_WIDTH):
+                entranceCells = [run[len(run) // 2]]
+            else:
+                entranceCells = [run[0], run[-1]]
+            for (x, y) in entranceCells:
+                this.entrances[border].append(((x, y), (x + offset[0], y + offset[1])))
+
+    # Work out the nodes of a cluster and the shortest distances
+    # between them which stay inside the cluster.
+    def createIntraEdges(this, cluster):
+        nodes = set()
+        borders = [(cluster, (1, 0)), (cluster, (0, 1)), \
+                   ((cluster[0] - 1, cluster[1]), (1, 0)), ((cluster[0], cluster[1] - 1), (0, 1))]
+        for border in borders:
+            for entrance in this.entrances.get(border, ()):
+                for coords in entrance:
+                    if (this.getClusterFromCoords(coords) == cluster):
+                        nodes.add(coords)
+        this.clusterNodes[cluster] = nodes
+
+        edges = dict()
+        freeCells = this.getFreeCellsOfCluster(cluster)
+        for node in nodes:
+            distances = this.getDistancesWithinCluster(node, cluster, freeCells)
+            edges[node] = [(otherNode, distances[otherNode]) for otherNode in nodes \
+                           if (otherNode != node) and (otherNode in distances)]
+        this.intraEdges[cluster] = edges
+
+    # Collect the edges which cross the borders between clusters
+    def createInterEdges(this):
+        this.interEdges = dict()
+        for entrances in this.entrances.values():
+            for (node, otherNode) in entrances:
+                this.interEdges.setdefault(node, list()).append((otherNode, 1))
+                this.interEdges.setdefault(otherNode, list()).append((node, 1))
+
+    # The coordinates of the free cells of a cluster
+    def getFreeCellsOfCluster(this, cluster):
+        minX = cluster[0] * this.clusterSize
+        minY = cluster[1] * this.clusterSize
+        maxX = min(minX + this.clusterSize, this.occupancyGrid.getWidth())
+        maxY = min(minY + this.clusterSize, this.occupancyGrid.getHeight())
+        return set((x, y) for x in range(minX, maxX) for y in range(minY, maxY) \
+                   if this.occupancyGrid.getCell(x, y) <= 0)
+
+    # Dijkstra search from a cell which does not leave its cluster.
+    # Returns a dictionary from the coordinates of each reachable cell
+    # to its distance. The free cells of the cluster can be passed in
+    # if they are already known.
+    def getDistancesWithinCluster(this, sourceCoords, cluster, freeCells=None):
+        if (freeCells is None):
+            freeCells = this.getFreeCellsOfCluster(cluster)
+
+        # This search runs many times while the abstract graph is
+        # built, so it uses heapq directly. Entries for cells which
+        # have already been settled are skipped when popped.
+        distances = {sourceCoords: 0}
+        done = set()
+        heap = [(0, sourceCoords)]
+        while heap:
+            distance, coords = heapq.heappop(heap)
+            if coords in done:
+                continue
+            done.add(coords)
+            this.numberOfCellsVisited = this.numberOfCellsVisited + 1
+            for (offsetX, offsetY, stepLength) in NEIGHBOUR_STEPS:
+                nextCoords = (coords[0] + offsetX, coords[1] + offsetY)
+                if (nextCoords not in freeCells) or (nextCoords in done):
+                    continue
+                nextDistance = distance + stepLength
+                if (nextDistance < distances.get(nextCoords, float("inf"))):
+                    distances[nextCoords] = nextDistance
+                    heapq.heappush(heap, (nextDistance, nextCoords))
+        return distances
+
+    # Octile distance between two cells
+    def heuristic(this, coords, goalCoords):
+        x = abs(coords[0]-goalCoords[0])
+        y = abs(coords[1]-goalCoords[1])
+        return (x+y) + (SQRT2 - 2)*min(x,y)
+
+    # Plan a path from startCoords to goalCoords. Returns True if the
+    # goal was reached. The path is available from extractPathToGoal.
+    def plan(this, startCoords, goalCoords):
+        this.updateAbstractGraph()
+        this.numberOfCellsVisited = 0
+        this.abstractPath = None
+
+        startCluster = this.getClusterFromCoords(startCoords)
+        goalCluster = this.getClusterFromCoords(goalCoords)
+
+        # Queries within one cluster are short, so they are passed
+        # straight to the refinement planner.
+        if (startCluster != goalCluster):
+            this.abstractPath = this.findAbstractPath(startCoords, goalCoords)
+
+        if (this.abstractPath is None):
+            this.abstractPath = [startCoords, goalCoords]
+
+        this.path = this.refineAbstractPath(this.abstractPath)
+        this.goalReached = this.path.goalReached
+
+        return this.goalReached
+
+    # Search the abstract graph, with the start and the goal linked to
+    # the nodes of their clusters. Returns the list of node
+    # coordinates from the start to the goal, or None.
+    def findAbstractPath(this, startCoords, goalCoords):
+
+        # Edges from the start to the nodes of its cluster, and from
+        # the nodes of the goal cluster to the goal
+        startCluster = this.getClusterFromCoords(startCoords)
+        distances = this.getDistancesWithinCluster(startCoords, startCluster)
+        startEdges = [(node, distances[node]) for node in this.clusterNodes[startCluster] \
+                      if node in distances]
+        goalCluster = this.getClusterFromCoords(goalCoords)
+        distances = this.getDistancesWithinCluster(goalCoords, goalCluster)
+        goalEdges = dict((node, distances[node]) for node in this.clusterNodes[goalCluster] \
+                         if node in distances)
+
+        # A* over the abstract graph
+        pathCosts = {startCoords: 0}
+        parents = {startCoords: None}
+        done = set()
+        queue = PriorityQueue()
+        queue.push(startCoords, this.heuristic(startCoords, goalCoords))
+        while (queue.isEmpty() == False):
+            node = queue.pop()
+            if (node == goalCoords):
+                path = list()
+                while (node is not None):
+                    path.append(node)
+                    node = parents[node]
+                path.reverse()
+                return path
+            done.add(node)
+            this.numberOfCellsVisited = this.numberOfCellsVisited + 1
+
+            if (node == startCoords):
+                edges = startEdges + this.interEdges.get(node, [])
+            else:
+                edges = this.intraEdges[this.getClusterFromCoords(node)].get(node, []) + \
+                    this.interEdges.get(node, [])
+            if node in goalEdges:
+                edges.append((goalCoords, goalEdges[node]))
+
+            for (nextNode, cost) in edges:
+                if nextNode in done:
+                    continue
+                pathCost = pathCosts[node] + cost
+                if (pathCost < pathCosts.get(nextNode, float("inf"))):
+                    pathCosts[nextNode] = pathCost
+                    parents[nextNode] = node
+                    queue.push(nextNode, pathCost + this.heuristic(nextNode, goalCoords))
+
+        return None
+
+    # Turn the abstract path into a path of cells by planning between
+    # each pair of consecutive nodes.
+    def refineAbstractPath(this, abstractPath):
+        path = PlannedPath()
+        path.goalReached = True
+        planner = this.refinementPlanner
+        for i in range(len(abstractPath) - 1):
+            reached = planner.plan(abstractPath[i], abstractPath[i + 1])
+            this.numberOfCellsVisited = this.numberOfCellsVisited + planner.numberOfCellsVisited
+            if (reached == False):
+                path.goalReached = False
+                break
+            waypoints = planner.extractPathToGoal().waypoints
+
+            # Each segment starts where the last one finished
+            if path.waypoints:
+                waypoints.popleft()
+            path.waypoints.extend(waypoints)
+        return path
+
+    # The path found by the last call to plan
+    def extractPathToGoal(this):
+        return this.path
@@ -0,0 +1,186 @@
+from PlannerBase import PlannerBase
+from PriorityQueue import PriorityQueue
+from PlannedPath import PlannedPath
+from SearchGrid import NEIGHBOUR_OFFSETS_FROM_MASK
+from Cell import CellLabel
+from Heuristics import diagonalHeuristic
+
+# This class implements jump point search (Harabor and Grastien,
+# 2011). It is A* with the octile heuristic, but instead of pushing
+# every neighbour of a cell onto the queue, it only pushes "jump
+# points". Starting from a cell, the search scans in a straight line
+# (or diagonally) until it hits something interesting - the goal, or a
+# cell with a forced neighbour which can only be reached optimally
+# through that cell. All the cells skipped on the way would have been
+# symmetric alternatives, so the returned paths are still optimal, but
+# far fewer cells are expanded on large open maps.
+#
+# As in the other planners, a diagonal move is allowed whenever the
+# target cell is free. Each edge between two jump points is a straight
+# or diagonal line, so its length is the Euclidean distance.
+
+class JPSPlanner(PlannerBase):
+
+    def __init__(this, occupancyGrid):
+        PlannerBase.__init__(this, occupancyGrid)
+        this.Queue = PriorityQueue()
+
+    # Add to the priority queue with score as priority
+    def pushCellOntoQueue(this, cell):
+        if cell.parent:
+            cell.pathCost = cell.parent.pathCost + this.costModel.getEdgeCost(cell.parent, cell)
+        this.Queue.push(cell, cell.pathCost + this.heuristic(cell))
+
+    # Octile distance to the goal, in the units of the cost model
+    def heuristic(this, cell):
+        h = diagonalHeuristic(cell.coords[0], cell.coords[1], \
+                              this.goal.coords[0], this.goal.coords[1])
+        return h * this.costModel.heuristicScale
+
+    # Check the queue size is zero
+    def isQueueEmpty(this):
+        return this.Queue.isEmpty()
+
+    # Get cell with smallest score
+    def popCellFromQueue(this):
+        return this.Queue.pop()
+
+    # If cell is alive, check for more efficient path
+    def resolveDuplicate(this, cell, parentCell):
+        if cell.label != CellLabel.DEAD:
+            distance = parentCell.pathCost + this.costModel.getEdgeCost(parentCell, cell)
+            if distance < cell.pathCost:
+                cell.pathCost = distance
+                cell.parent = parentCell
+                this.Queue.push(cell, cell.pathCost + this.heuristic(cell))
+
+    # Check if (x, y) is inside the grid and not obstructed
+    def isFree(this, x, y):
+        searchGrid = this.searchGrid
+        return (x >= 0) and (x < searchGrid.width) and (y >= 0) and (y < searchGrid.height) \
+            and (searchGrid.freeCells[y * searchGrid.width + x] == 1)
+
+    # The successors of a cell are the jump points found by scanning
+    # in each of the pruned directions.
+    def getNextCellsToBeVisited(this, cell):
+        cells = list()
+        x = cell.coords[0]
+        y = cell.coords[1]
+        for (offsetX, offsetY) in this.getPrunedDirections(cell):
+            jumpPoint = this.jump(x + offsetX, y + offsetY, offsetX, offsetY)
+            if (jumpPoint is not None):
+                cells.append(this.searchGrid.getCellFromCoords(jumpPoint))
+        return cells
+
+    # Work out which directions have to be searched from a cell. For
+    # the start cell these are all the free neighbours. Otherwise they
+    # are the natural neighbours (those straight ahead, given the
+    # direction the cell was reached from) and any forced neighbours
+    # created by obstacles next to the cell.
+    def getPrunedDirections(this, cell):
+        x = cell.coords[0]
+        y = cell.coords[1]
+        if (cell.parent is None):
+            return NEIGHBOUR_OFFSETS_FROM_MASK[this.searchGrid.getNeighbourMask(x, y)]
+
+        # The direction of travel, as unit steps
+        dx = cmp(x, cell.parent.coords[0])
+        dy = cmp(y, cell.parent.coords[1])
+        isFree = this.isFree
+        directions = list()
+
+        if ((dx != 0) and (dy != 0)):
+            directions.append((0, dy))
+            directions.append((dx, 0))
+            directions.append((dx, dy))
+            if (not isFree(x - dx, y)):
+                directions.append((-dx, dy))
+            if (not isFree(x, y - dy)):
+                directions.append((dx, -dy))
+        elif (dx != 0):
+            directions.append((dx, 0))
+            if (not isFree(x, y + 1)):
+                directions.append((dx, 1))
+            if (not isFree(x, y - 1)):
+                directions.append((dx, -1))
+        else:
+            directions.append((0, dy))
+            if (not isFree(x + 1, y)):
+                directions.append((1, dy))
+            if (not isFree(x - 1, y)):
+                directions.append((-1, dy))
+
+        return directions
+
+    # Scan from (x, y) in the direction (dx, dy) and return the
+    # coordinates of the first jump point, or None if the scan runs
+    # into an obstacle or off the grid. The scan is iterative because
+    # on large maps it can run for thousands of cells.
+    def jump(this, x, y, dx, dy):
+        isFree = this.isFree
+        goalX = this.goal.coords[0]
+        goalY = this.goal.coords[1]
+
+        while (isFree(x, y) == True):
+            if ((x == goalX) and (y == goalY)):
+                return (x, y)
+
+            if ((dx != 0) and (dy != 0)):
+                # Diagonal move: check for forced neighbours, then
+                # check if a horizontal or vertical scan from here
+                # finds a jump point.
+                if ((isFree(x - dx, y + dy) and not isFree(x - dx, y)) or \
+                    (isFree(x + dx, y - dy) and not isFree(x, y - dy))):
+                    return (x, y)
+                if ((this.jump(x + dx, y, dx, 0) is not None) or \
+                    (this.jump(x, y + dy, 0, dy) is not None)):
+                    return (x, y)
+            elif (dx != 0):
+                # Horizontal move
+                if ((isFree(x + dx, y + 1) and not isFree(x, y + 1)) or \
+                    (isFree(x + dx, y - 1) and not isFree(x, y - 1))):
+                    return (x, y)
+            else:
+                # Vertical move
+                if ((isFree(x + 1, y + dy) and not isFree(x + 1, y)) or \
+                    (isFree(x - 1, y + dy) and not isFree(x - 1, y))):
+                    return (x, y)
+
+            x = x + dx
+            y = y + dy
+
+        return None
+
+    # The parents form a chain of jump points. The path is filled in
+    # by stepping between each pair of jump points, so that it
+    # contains every cell, as with the other planners.
+    def extractPath(this, pathEndCell):
+
+        # Construct the path object and mark if the goal was reached
+        path = PlannedPath()
+        path.goalReached = this.goalReached
+
+        # Initial condition - the goal cell
+        path.waypoints.append(pathEndCell)
+
+        # Walk back through the jump points, adding the cells between
+        # each jump point and its parent.
+        cell = pathEndCell
+        while (cell.parent is not None):
+            parent = cell.parent
+            dx = cmp(parent.coords[0], cell.coords[0])
+            dy = cmp(parent.coords[1], cell.coords[1])
+            x = cell.coords[0] + dx
+            y = cell.coords[1] + dy
+            while ((x, y) != parent.coords):
+                path.waypoints.appendleft(this.searchGrid.getCellFromCoords((x, y)))
+                x = x + dx
+                y = y + dy
+            path.waypoints.appendleft(parent)
+            cell = parent
+
+        # Now draw the path
+        this.drawPath(path)
+
+        # Return the path
+        return path
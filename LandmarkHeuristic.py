@@ -0,0 +1,226 @@
+from ArraySearchGrid import ArraySearchGrid
+from DistanceField import computeDistanceField
+from Heuristics import registerHeuristic
+from array import array
+
+import struct
+import sys
+import zlib
+
+# NumPy is optional. It speeds up choosing the landmarks and is needed
+# for the vectorized heuristic.
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# This class implements the landmark (ALT, or differential) heuristic
+# of Goldberg and Harrelson. A few landmark cells are chosen, and the
+# distance from each landmark to every cell of the map is computed in
+# advance. By the triangle inequality, for any landmark L,
+#
+#   d(v, goal) >= |d(L, goal) - d(L, v)|
+#
+# so the largest of these differences is an admissible and consistent
+# heuristic. On maps with many walls, such as mazes, it is much closer
+# to the true distance than the geometric heuristics.
+#
+# The landmarks are chosen by farthest point selection: each new
+# landmark is the reachable cell which is farthest from the landmarks
+# chosen so far. The distances are stored as 32 bit floats, one array
+# per landmark. To allow for rounding, the heuristic is reduced by a
+# small tolerance.
+#
+# Typical use:
+#
+#   landmarks = LandmarkHeuristic.fromOccupancyGrid(occupancyGrid, 8)
+#   landmarks.save("map.landmarks")
+#   ...
+#   landmarks = LandmarkHeuristic.load("map.landmarks", occupancyGrid)
+#   landmarks.register()
+#   planner = AStarPlanner(occupancyGrid, "landmark")
+#
+# The tables only match the map they were computed for. The file
+# stores a checksum of the free cells, and load refuses to use a file
+# made for a different map.
+
+class LandmarkHeuristic(object):
+
+    # The start of the file format
+    MAGIC = b"ALT1"
+
+    def __init__(this, width, height, landmarks, distanceFields, checksum):
+        this.width = width
+        this.height = height
+        this.landmarks = landmarks
+        this.distanceFields = distanceFields
+        this.checksum = checksum
+
+        # 32 bit floats have a 24 bit mantissa. The difference of two
+        # distances can be out by twice the rounding error of the
+        # largest distance.
+        largestDistance = 0
+        for distances in distanceFields:
+            index = getFarthestIndex(distances)
+            if (index is not None):
+                largestDistance = max(largestDistance, distances[index])
+        this.tolerance = 4 * largestDistance * 2.0**-24
+
+    # Choose numberOfLandmarks landmarks on the occupancy grid and
+    # compute their distance fields
+    @classmethod
+    def fromOccupancyGrid(cls, occupancyGrid, numberOfLandmarks=8):
+        searchGrid = ArraySearchGrid.fromOccupancyGrid(occupancyGrid)
+        width = searchGrid.width
+        checksum = getFreeCellsChecksum(searchGrid)
+
+        # Start from the first free cell. The first landmark is the
+        # cell farthest from it.
+        landmarks = []
+        distanceFields = []
+        firstFreeIndex = searchGrid.freeCells.find(b"\x01")
+        if (firstFreeIndex < 0):
+            return cls(width, searchGrid.height, landmarks, distanceFields, checksum)
+        distances, numberOfCellsSettled = computeDistanceField(searchGrid, \
+            (firstFreeIndex % width, firstFreeIndex // width))
+        closestDistances = distances
+
+        while (len(landmarks) < numberOfLandmarks):
+            index = getFarthestIndex(closestDistances)
+            if (index is None):
+                break
+            coords = (index % width, index // width)
+            if coords in landmarks:
+                break
+            distances, numberOfCellsSettled = computeDistanceField(searchGrid, coords)
+            landmarks.append(coords)
+            distanceFields.append(distances)
+            if (len(distanceFields) == 1):
+                closestDistances = distances
+            else:
+                closestDistances = getMinimumDistances(closestDistances, distances)
+
+        return cls(width, searchGrid.height, landmarks, distanceFields, checksum)
+
+    # The heuristic from (x, y) to (goalX, goalY)
+    def __call__(this, x, y, goalX, goalY):
+        inf = float("inf")
+        index = y * this.width + x
+        goalIndex = goalY * this.width + goalX
+        h = 0
+        for distances in this.distanceFields:
+            distance = distances[index]
+            goalDistance = distances[goalIndex]
+            if ((distance == inf) or (goalDistance == inf)):
+                # If only one of the cells can be reached from the
+                # landmark, they are not connected
+                if (distance != goalDistance):
+                    return inf
+                continue
+            difference = abs(goalDistance - distance)
+            if (difference > h):
+                h = difference
+        return max(h - this.tolerance, 0)
+
+    # The heuristic for arrays of x and y coordinates
+    def vectorized(this, x, y, goalX, goalY):
+        h = numpy.zeros(numpy.shape(x))
+        indices = y * this.width + x
+        goalIndex = goalY * this.width + goalX
+        for distances in this.distanceFields:
+            field = numpy.frombuffer(distances, dtype=numpy.float32).astype(numpy.float64)
+            distance = field[indices]
+            goalDistance = field[goalIndex]
+            with numpy.errstate(invalid="ignore"):
+                difference = numpy.abs(goalDistance - distance)
+                unreachable = numpy.isinf(distance) != numpy.isinf(goalDistance)
+                difference[numpy.isnan(difference)] = 0
+            difference[unreachable] = float("inf")
+            h = numpy.maximum(h, difference)
+        return numpy.maximum(h - this.tolerance, 0)
+
+    # Add the heuristic to the registry in Heuristics
+    def register(this, name="landmark"):
+        registerHeuristic(name, this, this.vectorized, isConsistent=True)
+
+    def getLandmarks(this):
+        return list(this.landmarks)
+
+    # Save the landmarks and distance fields. The file has a header,
+    # the landmark coordinates and then the distance fields as little
+    # endian 32 bit floats.
+    def save(this, filename):
+        with open(filename, "wb") as landmarkFile:
+            landmarkFile.write(struct.pack("<4siiiI", LandmarkHeuristic.MAGIC, this.width, \
+                                           this.height, len(this.landmarks), this.checksum))
+            for (x, y) in this.landmarks:
+                landmarkFile.write(struct.pack("<ii", x, y))
+            for distances in this.distanceFields:
+                if (sys.byteorder == "big"):
+                    distances = array('f', distances)
+                    distances.byteswap()
+                distances.tofile(landmarkFile)
+
+    # Load landmarks saved with save. If occupancyGrid is given, the
+    # file is checked against it and ValueError is raised if it was
+    # made for a different map.
+    @classmethod
+    def load(cls, filename, occupancyGrid=None):
+        with open(filename, "rb") as landmarkFile:
+            headerSize = struct.calcsize("<4siiiI")
+            magic, width, height, numberOfLandmarks, checksum = \
+                struct.unpack("<4siiiI", landmarkFile.read(headerSize))
+            if (magic != LandmarkHeuristic.MAGIC):
+                raise ValueError(filename + " is not a landmark file")
+            landmarks = []
+            for i in range(numberOfLandmarks):
+                landmarks.append(struct.unpack("<ii", landmarkFile.read(8)))
+            distanceFields = []
+            for i in range(numberOfLandmarks):
+                distances = array('f')
+                distances.fromfile(landmarkFile, width * height)
+                if (sys.byteorder == "big"):
+                    distances.byteswap()
+                distanceFields.append(distances)
+
+        if (occupancyGrid is not None):
+            if ((occupancyGrid.getWidth() != width) or (occupancyGrid.getHeight() != height)):
+                raise ValueError(filename + " was made for a map of a different size")
+            searchGrid = ArraySearchGrid.fromOccupancyGrid(occupancyGrid)
+            if (getFreeCellsChecksum(searchGrid) != checksum):
+                raise ValueError(filename + " was made for a different map")
+
+        return cls(width, height, landmarks, distanceFields, checksum)
+
+# A checksum of which cells of a search grid are free
+def getFreeCellsChecksum(searchGrid):
+    return zlib.crc32(bytes(searchGrid.freeCells)) & 0xffffffff
+
+# The smaller of two distances for each cell
+def getMinimumDistances(distances, otherDistances):
+    if (numpy is not None):
+        minimum = numpy.minimum(numpy.frombuffer(distances, dtype=numpy.float32), \
+                                numpy.frombuffer(otherDistances, dtype=numpy.float32))
+        return array('f', minimum.tobytes())
+    return array('f', map(min, distances, otherDistances))
+
+# The index of the largest finite distance, or None if there is none
+# (or it is zero)
+def getFarthestIndex(distances):
+    if (numpy is not None):
+        field = numpy.frombuffer(distances, dtype=numpy.float32)
+        field = numpy.where(numpy.isinf(field), -1, field)
+        index = int(numpy.argmax(field))
+        if (field[index] <= 0):
+            return None
+        return index
+
+    farthestIndex = None
+    farthestDistance = 0
+    inf = float("inf")
+    for index in range(len(distances)):
+        distance = distances[index]
+        if ((distance != inf) and (distance > farthestDistance)):
+            farthestDistance = distance
+            farthestIndex = index
+    return farthestIndex
@@ -0,0 +1,132 @@
+from OccupancyGrid import OccupancyGrid
+import random
+
+# Functions which generate synthetic occupancy grids for testing and
+# benchmarking the planners. Each generator takes the size of the map
+# and a random seed, so the same map can be generated again, and
+# returns a new OccupancyGrid. If useArray is True, the grid uses the
+# NumPy array backend, which is much smaller for large maps.
+#
+# The cells are written directly into the data of the new grid rather
+# than through setCell, since nothing can be listening to the grid
+# yet.
+
+# A map with no obstacles
+def generateEmptyMap(width, height, resolution=0.5, seed=0, useArray=False):
+    return OccupancyGrid(width, height, resolution, useArray)
+
+# A map in which each cell is blocked independently with probability
+# density
+def generateRandomMap(width, height, density=0.2, resolution=0.5, seed=0, useArray=False):
+    occupancyGrid = OccupancyGrid(width, height, resolution, useArray)
+    generator = random.Random(seed)
+    for y in range(height):
+        occupancyGrid.data[y][:] = [1 if (generator.random() < density) else 0 \
+                                    for x in range(width)]
+    return occupancyGrid
+
+# A perfect maze, generated with a randomised depth first search. The
+# passages are one cell wide and lie on the cells with odd
+# coordinates; the cells in between are walls unless the search
+# knocked them through.
+def generateMaze(width, height, resolution=0.5, seed=0, useArray=False):
+    occupancyGrid = OccupancyGrid(width, height, resolution, useArray)
+    generator = random.Random(seed)
+    for y in range(height):
+        occupancyGrid.data[y][:] = [1] * width
+
+    # The maze is searched on the grid of passage cells, which are
+    # at (2 * i + 1, 2 * j + 1) in the map.
+    mazeWidth = (width - 1) // 2
+    mazeHeight = (height - 1) // 2
+    if ((mazeWidth <= 0) or (mazeHeight <= 0)):
+        return occupancyGrid
+    steps = ((0, -1), (1, 0), (0, 1), (-1, 0))
+    visited = bytearray(mazeWidth * mazeHeight)
+    visited[0] = 1
+    occupancyGrid.data[1][1] = 0
+    stack = [(0, 0)]
+    while stack:
+        i, j = stack[-1]
+        candidates = [(i + stepI, j + stepJ) for (stepI, stepJ) in steps \
+                      if (0 <= i + stepI < mazeWidth) and (0 <= j + stepJ < mazeHeight) \
+                      and (visited[(j + stepJ) * mazeWidth + i + stepI] == 0)]
+        if not candidates:
+            stack.pop()
+            continue
+        nextI, nextJ = generator.choice(candidates)
+        visited[nextJ * mazeWidth + nextI] = 1
+        occupancyGrid.data[j + nextJ + 1][i + nextI + 1] = 0
+        occupancyGrid.data[2 * nextJ + 1][2 * nextI + 1] = 0
+        stack.append((nextI, nextJ))
+
+    return occupancyGrid
+
+# A map divided into square rooms of side roomSize cells by walls one
+# cell thick. Each wall between two neighbouring rooms has a door of
+# doorWidth cells at a random position along it.
+def generateRoomsAndDoors(width, height, roomSize=16, doorWidth=2, resolution=0.5, \
+                          seed=0, useArray=False):
+    occupancyGrid = OccupancyGrid(width, height, resolution, useArray)
+    generator = random.Random(seed)
+    data = occupancyGrid.data
+
+    # Draw the walls
+    for y in range(roomSize, height, roomSize):
+        data[y][:] = [1] * width
+    for y in range(height):
+        for x in range(roomSize, width, roomSize):
+            data[y][x] = 1
+
+    # Cut a door through each wall segment. The walls run along the
+    # rows and columns which are multiples of roomSize, and each
+    # segment lies between two of the crossings.
+    doorWidth = max(1, min(doorWidth, roomSize - 1))
+    for wallY in range(roomSize, height, roomSize):
+        for segmentX in range(0, width, roomSize):
+            segmentEnd = min(segmentX + roomSize, width)
+            firstX = segmentX + 1 if (segmentX > 0) else segmentX
+            if (segmentEnd - firstX < doorWidth):
+                continue
+            doorX = generator.randint(firstX, segmentEnd - doorWidth)
+            for x in range(doorX, doorX + doorWidth):
+                data[wallY][x] = 0
+    for wallX in range(roomSize, width, roomSize):
+        for segmentY in range(0, height, roomSize):
+            segmentEnd = min(segmentY + roomSize, height)
+            firstY = segmentY + 1 if (segmentY > 0) else segmentY
+            if (segmentEnd - firstY < doorWidth):
+                continue
+            doorY = generator.randint(firstY, segmentEnd - doorWidth)
+            for y in range(doorY, doorY + doorWidth):
+                data[y][wallX] = 0
+
+    return occupancyGrid
+
+# The generators by name
+MAP_GENERATORS = {
+    "empty": generateEmptyMap,
+    "random": generateRandomMap,
+    "maze": generateMaze,
+    "rooms": generateRoomsAndDoors,
+}
+
+# Return the free cell which is closest to coords, searching outwards
+# in growing squares. Returns None if the map has no free cells. This
+# is used to pick starts and goals which are not inside obstacles.
+def findFreeCellNear(occupancyGrid, coords):
+    width = occupancyGrid.getWidth()
+    height = occupancyGrid.getHeight()
+    x = min(max(coords[0], 0), width - 1)
+    y = min(max(coords[1], 0), height - 1)
+    for radius in range(max(width, height)):
+        for offsetY in range(-radius, radius + 1):
+            for offsetX in range(-radius, radius + 1):
+                if (max(abs(offsetX), abs(offsetY)) != radius):
+                    continue
+                candidateX = x + offsetX
+                candidateY = y + offsetY
+                if ((0 <= candidateX < width) and (0 <= candidateY < height) and \
+                    (occupancyGrid.getCell(candidateX, candidateY) == 0)):
+                    return (candidateX, candidateY)
+    return None
@@ -0,0 +1,149 @@
+from MappedOccupancyGrid import MappedOccupancyGrid
+from OccupancyGrid import numpy
+
+import os
+
+# PyYAML is optional. Map metadata files are simple enough to be read
+# without it.
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+# Functions for opening map files in the format used by the ROS
+# map_server: an image plus a YAML file which gives the resolution and
+# the thresholds used to decide which pixels are blocked. For example:
+#
+#   image: office.pgm
+#   resolution: 0.05
+#   origin: [-10.0, -10.0, 0.0]
+#   negate: 0
+#   occupied_thresh: 0.65
+#   free_thresh: 0.196
+#
+#   occupancyGrid = loadMap("office.yaml")
+#
+# The image can be a binary PGM (P5) file, with 8 or 16 bit pixels, or
+# a raw file of 8 bit pixels whose size is given by "width" and
+# "height" entries in the YAML file. The image is memory mapped rather
+# than read, so opening a map takes about the same time whatever its
+# size, and returns a MappedOccupancyGrid. NumPy is required.
+#
+# As in map_server, the occupancy probability of a pixel with value v
+# is (maximum - v) / maximum, or v / maximum if negate is set. Pixels
+# above occupied_thresh are blocked and pixels below free_thresh are
+# free. The pixels in between are unknown, and are treated as blocked
+# unless unknownIsOccupied is False.
+
+# Read the metadata from a map_server YAML file into a dictionary
+def readMapMetadata(yamlFilename):
+    with open(yamlFilename, "r") as yamlFile:
+        text = yamlFile.read()
+    if (yaml is not None):
+        return yaml.safe_load(text)
+    return parseSimpleYaml(text)
+
+# Parse a YAML file made of "key: value" lines, which is all that a
+# map_server file contains. Values which look like numbers or lists of
+# numbers are converted.
+def parseSimpleYaml(text):
+    metadata = dict()
+    for line in text.splitlines():
+        line = line.split("#", 1)[0].strip()
+        if ((line == "") or (":" not in line)):
+            continue
+        key, value = line.split(":", 1)
+        metadata[key.strip()] = parseSimpleYamlValue(value.strip())
+    return metadata
+
+def parseSimpleYamlValue(value):
+    if (value.startswith("[") and value.endswith("]")):
+        return [parseSimpleYamlValue(item.strip()) for item in value[1:-1].split(",") \
+                if item.strip() != ""]
+    if ((len(value) >= 2) and (value[0] == value[-1]) and (value[0] in "'\"")):
+        return value[1:-1]
+    for convert in (int, float):
+        try:
+            return convert(value)
+        except ValueError:
+            pass
+    return value
+
+# Open a map from its YAML file and return it as a MappedOccupancyGrid
+def loadMap(yamlFilename, unknownIsOccupied=True):
+    if (numpy is None):
+        raise ImportError("Loading map files requires numpy")
+    metadata = readMapMetadata(yamlFilename)
+
+    # The image name is relative to the YAML file
+    imageFilename = os.path.join(os.path.dirname(os.path.abspath(yamlFilename)), \
+                                 metadata["image"])
+    if imageFilename.lower().endswith(".pgm"):
+        pixels, maximumValue = openPgm(imageFilename)
+    elif imageFilename.lower().endswith(".raw"):
+        pixels = openRaw(imageFilename, int(metadata["width"]), int(metadata["height"]))
+        maximumValue = 255
+    else:
+        raise ValueError("Only PGM and raw map images can be memory mapped, not " + imageFilename)
+
+    mode = metadata.get("mode", "trinary")
+    if mode not in ("trinary", "scale"):
+        raise ValueError("Unsupported map mode " + str(mode))
+
+    lookupTable = createThresholdTable(maximumValue, bool(metadata.get("negate", 0)), \
+                                       float(metadata.get("occupied_thresh", 0.65)), \
+                                       float(metadata.get("free_thresh", 0.196)), \
+                                       unknownIsOccupied)
+
+    # Row y of the occupancy grid is row y of the image, the same
+    # layout that setFromDataArrayFromMapServer produces from the
+    # (bottom up) map server data
+    origin = tuple(metadata.get("origin", (0.0, 0.0, 0.0)))
+    return MappedOccupancyGrid(pixels, float(metadata["resolution"]), lookupTable, origin)
+
+# Memory map the pixels of a binary PGM file. Returns the pixels as a
+# read only (height, width) array, with the first row of the file
+# first, and the maximum pixel value.
+def openPgm(filename):
+    with open(filename, "rb") as pgmFile:
+        header = []
+        offset = 0
+        while (len(header) < 4):
+            line = pgmFile.readline()
+            if not line:
+                raise ValueError(filename + " is not a complete PGM file")
+            offset = offset + len(line)
+            header.extend(line.split(b"#", 1)[0].split())
+    if (header[0] != b"P5"):
+        raise ValueError(filename + " is not a binary (P5) PGM file")
+    width = int(header[1])
+    height = int(header[2])
+    maximumValue = int(header[3])
+
+    # The pixels are expected to start on the line after the maximum
+    # value, as PGM writers normally produce
+    if (len(header) > 4):
+        raise ValueError(filename + " has pixel data on its header line")
+
+    dtype = numpy.uint8 if (maximumValue < 256) else numpy.dtype(">u2")
+    pixels = numpy.memmap(filename, dtype=dtype, mode="r", offset=offset, shape=(height, width))
+    return pixels, maximumValue
+
+# Memory map a raw file of width x height 8 bit pixels, stored a row
+# at a time starting from the top of the map
+def openRaw(filename, width, height):
+    return numpy.memmap(filename, dtype=numpy.uint8, mode="r", shape=(height, width))
+
+# Create the table which maps each pixel value to 0 (free) or 1
+# (blocked)
+def createThresholdTable(maximumValue, negate, occupiedThreshold, freeThreshold, \
+                         unknownIsOccupied=True):
+    size = 256 if (maximumValue < 256) else 65536
+    values = numpy.minimum(numpy.arange(size), maximumValue).astype(numpy.float64)
+    if negate:
+        occupancy = values / maximumValue
+    else:
+        occupancy = (maximumValue - values) / maximumValue
+    if unknownIsOccupied:
+        return (occupancy >= freeThreshold).astype(numpy.uint8)
+    return (occupancy > occupiedThreshold).astype(numpy.uint8)
@@ -0,0 +1,57 @@
+from OccupancyGrid import OccupancyGrid, numpy
+
+# This class is an occupancy grid whose cells are read from the pixels
+# of a map image, usually a memory mapped file opened with MapLoader.
+# The pixels are not copied when the grid is created: getCell converts
+# a pixel to 0 (free) or 1 (blocked) through a lookup table each time
+# it is called. Since the file is mapped read only, its pages are
+# shared by all the processes which use the map, including workers
+# forked after it was opened.
+#
+# The search grids and the distance transform only need to know which
+# cells are blocked. getBlockedArray works this out from the pixels
+# each time it is called, as a temporary boolean array, so planning
+# does not make a private copy of the map in each process.
+#
+# The first call to getDataArray, or any change to the cells, does
+# convert the whole image into a uint8 array of cells, which belongs
+# to the process that made it. From then on the grid behaves like an
+# ordinary grid with the array backend. pixels must be indexed as
+# pixels[y, x], as the cells of the other occupancy grids are.
+
+class MappedOccupancyGrid(OccupancyGrid):
+
+    def __init__(this, pixels, resolution, lookupTable, origin=(0.0, 0.0, 0.0)):
+        OccupancyGrid.__init__(this, 0, 0, resolution, useArray=True)
+        this.height, this.width = pixels.shape
+        this.pixels = pixels
+        this.lookupTable = lookupTable
+        this.blockedTable = (lookupTable > 0)
+        this.origin = origin
+        this.cells = None
+
+    # The cells as a (height, width) uint8 array. This is computed from
+    # the pixels the first time it is needed.
+    @property
+    def data(this):
+        if (this.cells is None):
+            this.cells = this.lookupTable[this.pixels]
+        return this.cells
+
+    @data.setter
+    def data(this, cells):
+        this.cells = cells
+
+    # The blocked cells, read through the lookup table without
+    # converting the image
+    def getBlockedArray(this):
+        if (this.cells is None):
+            return this.blockedTable[this.pixels]
+        return (this.cells > 0)
+
+    # Get the status of a cell. Until the cells have been converted,
+    # this reads the pixel directly.
+    def getCell(this, x, y):
+        if (this.cells is None):
+            return int(this.lookupTable[this.pixels[y, x]])
+        return this.cells[y][x]
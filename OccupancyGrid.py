@@ -1,35 +1,208 @@
 from helpers import clamp
 
+# NumPy is optional. It is only needed for the array backend.
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 # This class stores the occupancy grid. This is a "chessboard-like"
 # representation of the environment. The environment is represented by
 # a set of square cells. Each cell encodes whether that bit of the
 # environment is free, or whether it is blocked. A "0" says that a
 # cell is free and so the robot can travel over it. A "1" means that
 # it is blocked and the robot cannot travel over it.
+#
+# By default the cells are stored as a list of lists of Python
+# ints. For large maps, the grid can instead be stored in a single
+# contiguous uint8 NumPy array (indexed as data[y, x]). This uses one
+# byte per cell and allows the map server data to be converted in a
+# single vectorized operation.
+#
+# The grid has a version number which is incremented whenever the
+# cells are changed through setCell or setFromDataArrayFromMapServer.
+# Anything which caches information derived from the map (such as the
+# search grid) compares the version to decide if it is out of
+# date. Changes made by writing to data directly are not detected.
+#
+# Objects which need to know exactly which cells changed can register
+# a listener with addChangeListener. The listener is called as
+# listener(x, y) from setCell, and as listener(None, None) when the
+# whole map is replaced.
+#
+# With NumPy, the grid can also compute the distance from each cell to
+# the nearest obstacle, and from that an inflated copy of itself in
+# which every cell closer to an obstacle than the radius of the robot
+# is blocked. Planning on the inflated grid treats the robot as a disc
+# rather than a point. Both are cached until the version changes.
 
 class OccupancyGrid(object):
 
     # Construct a new occupancy grid with a given width and
     # height. The resolution says the lenght of the side of each cell
     # in metres. By default, all the cells are set to "0" which means
-    # that there are no obstacles.
-    def __init__(this, width, height, resolution):
+    # that there are no obstacles. If useArray is True, the cells are
+    # stored in a NumPy array.
+    def __init__(this, width, height, resolution, useArray=False):
         this.width = width
         this.height = height
         this.resolution = resolution
-        this.data = [[0 for x in range(width)] for y in range(height)]
+        this.useArray = useArray
+        this.version = 0
+        this.changeListeners = []
+        this.distanceTransform = None
+        this.distanceTransformKey = None
+        this.inflatedGrids = dict()
+        this.inflatedGridsVersion = None
+        if (useArray == True):
+            if (numpy is None):
+                raise ImportError("The array backend of OccupancyGrid requires numpy")
+            this.data = numpy.zeros((height, width), dtype=numpy.uint8)
+        else:
+            this.data = [[0 for x in range(width)] for y in range(height)]
+
+    # Construct an occupancy grid which uses an existing buffer of
+    # width * height bytes, for example shared memory, as its
+    # cells. The buffer is not copied. This uses the array backend.
+    @classmethod
+    def fromBuffer(cls, width, height, resolution, buffer):
+        this = cls(0, 0, resolution, useArray=True)
+        this.width = width
+        this.height = height
+        this.data = numpy.frombuffer(buffer, dtype=numpy.uint8).reshape(height, width)
+        return this
 
     # Set the data from the array received from the map server. The
     # memory layout is different, so we have to flip it here. The map
     # server also scales 100 to mean free and 0 to mean blocked. We
     # use 0 for free and 1 for blocked.
     def setFromDataArrayFromMapServer(this, data):
-        for x in range(this.width):
-            for y in range(this.height):
-                if (data[len(data)-(this.height-y-1)-this.width*x-1] == 100):
-                    this.data[x][y] = 1
-                else:
-                    this.data[x][y] = 0
+        this.version = this.version + 1
+        if (this.useArray == True):
+            this.setFromDataArrayFromMapServerVectorized(data)
+        else:
+            for x in range(this.width):
+                for y in range(this.height):
+                    if (data[len(data)-(this.height-y-1)-this.width*x-1] == 100):
+                        this.data[x][y] = 1
+                    else:
+                        this.data[x][y] = 0
+        for listener in this.changeListeners:
+            listener(None, None)
+
+    # Array backend version of setFromDataArrayFromMapServer. The map
+    # server stores the rows bottom up, so cell (x, y) comes from
+    # element (height - y - 1) * width + x. The flip and the threshold
+    # are applied to the whole array at once.
+    def setFromDataArrayFromMapServerVectorized(this, data):
+        mapData = numpy.asarray(data).reshape(this.height, this.width)
+        this.data = (mapData[::-1] == 100).astype(numpy.uint8)
+
+    # Return the cells as a (height, width) NumPy array. For the array
+    # backend this is the data itself, not a copy.
+    def getDataArray(this):
+        if (this.useArray == True):
+            return this.data
+        return numpy.array(this.data, dtype=numpy.uint8)
+
+    # Return a (height, width) boolean NumPy array which is True for
+    # the blocked cells. This is all that the search grids and the
+    # distance transform need.
+    def getBlockedArray(this):
+        return (this.getDataArray() > 0)
+
+    # Return a (height, width) array giving the Euclidean distance, in
+    # cells, from the centre of each cell to the centre of the nearest
+    # blocked cell. Distances larger than maximumDistance are returned
+    # as infinity; if maximumDistance is None the transform is
+    # complete. The complete transform is cached until the version of
+    # the grid changes, so any maximumDistance can be used without
+    # computing it again.
+    def getDistanceTransform(this, maximumDistance=None):
+        if (numpy is None):
+            raise ImportError("The distance transform of OccupancyGrid requires numpy")
+        if (this.distanceTransformKey != this.version):
+            this.distanceTransform = this.computeDistanceTransform()
+            this.distanceTransformKey = this.version
+        if (maximumDistance is None):
+            return this.distanceTransform
+        distances = this.distanceTransform.copy()
+        distances[distances > maximumDistance] = float("inf")
+        return distances
+
+    # Compute the distance transform in two separable passes. The
+    # first finds the distance to the nearest blocked cell in the same
+    # column, sweeping down and then up the rows. The second combines
+    # the columns: the squared distance to the nearest obstacle is the
+    # smallest value of column distance squared plus offset squared
+    # over the cells of the row.
+    #
+    # On most maps every cell is close to an obstacle, and trying the
+    # offsets in increasing order over whole arrays settles every
+    # distance after a few offsets. The largest distance is checked at
+    # each power of two, and the loop stops once no distance can get
+    # any smaller. If that has not happened by DIRECT_OFFSET_LIMIT, the
+    # rows are finished with computeRowSquaredDistances instead, which
+    # takes time linear in the number of cells however far apart the
+    # obstacles are.
+    DIRECT_OFFSET_LIMIT = 8
+
+    def computeDistanceTransform(this):
+        blocked = this.getBlockedArray()
+        height, width = blocked.shape
+        inf = float("inf")
+        if (blocked.any() == False):
+            return numpy.full((height, width), inf)
+
+        columnDistances = numpy.full((height, width), inf)
+        previous = numpy.full(width, inf)
+        for y in range(height):
+            previous = numpy.where(blocked[y], 0, previous + 1)
+            columnDistances[y] = previous
+        previous = numpy.full(width, inf)
+        for y in range(height - 1, -1, -1):
+            previous = numpy.where(blocked[y], 0, previous + 1)
+            columnDistances[y] = numpy.minimum(columnDistances[y], previous)
+
+        columnSquared = columnDistances * columnDistances
+        squaredDistances = columnSquared.copy()
+        offset = 1
+        while (offset < width):
+            if (((offset & (offset - 1)) == 0) and (offset * offset >= squaredDistances.max())):
+                break
+            if (offset > OccupancyGrid.DIRECT_OFFSET_LIMIT):
+                return numpy.sqrt(computeRowSquaredDistances(columnSquared))
+            offsetSquared = offset * offset
+            numpy.minimum(squaredDistances[:, offset:], \
+                          columnSquared[:, :-offset] + offsetSquared, \
+                          out=squaredDistances[:, offset:])
+            numpy.minimum(squaredDistances[:, :-offset], \
+                          columnSquared[:, offset:] + offsetSquared, \
+                          out=squaredDistances[:, :-offset])
+            offset = offset + 1
+        return numpy.sqrt(squaredDistances)
+
+    # Return an occupancy grid in which every cell whose centre is
+    # within radius (in metres) of the centre of a blocked cell is
+    # blocked. The grid uses the array backend and is cached for each
+    # radius until the version of this grid changes, so planners can
+    # switch between radii without the map being reloaded. The
+    # inflated grid is a separate copy: after changing this grid, call
+    # getInflatedGrid again to get an up to date one.
+    def getInflatedGrid(this, radius):
+        if (this.inflatedGridsVersion != this.version):
+            this.inflatedGrids = dict()
+            this.inflatedGridsVersion = this.version
+        inflatedGrid = this.inflatedGrids.get(radius)
+        if (inflatedGrid is None):
+            radiusInCells = radius / float(this.resolution)
+            distances = this.getDistanceTransform(radiusInCells)
+            inflatedGrid = OccupancyGrid(0, 0, this.resolution, useArray=True)
+            inflatedGrid.width = this.width
+            inflatedGrid.height = this.height
+            inflatedGrid.data = (distances <= radiusInCells).astype(numpy.uint8)
+            this.inflatedGrids[radius] = inflatedGrid
+        return inflatedGrid
 
     # The width of the occupancy map in cells                
     def getWidth(this):
@@ -50,6 +223,17 @@ class OccupancyGrid(object):
     # Set the status of a cell.
     def setCell(this, x, y, c):
         this.data[y][x] = c
+        this.version = this.version + 1
+        for listener in this.changeListeners:
+            listener(x, y)
+
+    # Register a function to be called when cells are changed
+    def addChangeListener(this, listener):
+        this.changeListeners.append(listener)
+
+    # Stop calling a function registered with addChangeListener
+    def removeChangeListener(this, listener):
+        this.changeListeners.remove(listener)
     
     # Take a position in world coordinates (i.e., m) and turn it into
     # cell coordinates. Clamp the value so that it always falls within
@@ -70,3 +254,84 @@ class OccupancyGrid(object):
                       (cellCoords[1] + 0.5) * this.resolution)
 
         return worldCoords
+
+# The second pass of the distance transform. For each row of f, return
+# the smallest value of f[x'] + (x - x')^2 over x', for every x. This
+# uses the lower envelope of parabolas of Felzenszwalb and Huttenlocher
+# ("Distance Transforms of Sampled Functions", 2012): the parabola
+# rooted at each finite f[x'] is added in turn, dropping those it
+# hides, and the envelope is then read off from left to right. Both
+# steps are linear in the width. The rows are processed together, so
+# the Python loop is over the columns and each step is a NumPy
+# operation on all the rows at once.
+def computeRowSquaredDistances(f):
+    height, width = f.shape
+    inf = float("inf")
+    rows = numpy.arange(height)
+    finiteColumns = numpy.ascontiguousarray(numpy.isfinite(f).T)
+    g = f + numpy.arange(width, dtype=numpy.float64) ** 2
+    gColumns = numpy.ascontiguousarray(g.T)
+    g = g.ravel()
+
+    # For each row, the envelope is made of parabolas k = 0..last,
+    # rooted at roots[row, k], with parabola k lowest between
+    # boundaries[row, k] and boundaries[row, k + 1]. The arrays are
+    # indexed through their flat versions, which is faster.
+    roots = numpy.zeros((height, width), dtype=numpy.intp)
+    boundaries = numpy.full((height, width + 1), inf)
+    flatRoots = roots.ravel()
+    flatBoundaries = boundaries.ravel()
+    rowStarts = rows * width
+    boundaryRowStarts = rows * (width + 1)
+    last = numpy.full(height, -1, dtype=numpy.intp)
+
+    for x in range(width):
+        finite = finiteColumns[x]
+        if finite.all():
+            active = rows
+        else:
+            active = rows[finite]
+            if (len(active) == 0):
+                continue
+        k = last[active]
+        gx = gColumns[x][active]
+
+        # Where the new parabola crosses the last one in the envelope.
+        # Parabolas which lie above it from their left boundary are
+        # dropped. Rows with an empty envelope start at -infinity.
+        crossings = numpy.full(len(active), -inf)
+        candidates = numpy.nonzero(k >= 0)[0]
+        while (len(candidates) > 0):
+            candidateRows = active[candidates]
+            candidateK = k[candidates]
+            candidateRoots = flatRoots[rowStarts[candidateRows] + candidateK]
+            crossing = (gx[candidates] - g[rowStarts[candidateRows] + candidateRoots]) / \
+                (2.0 * (x - candidateRoots))
+            crossings[candidates] = crossing
+            hidden = (crossing <= flatBoundaries[boundaryRowStarts[candidateRows] + candidateK])
+            candidates = candidates[hidden]
+            k[candidates] = k[candidates] - 1
+
+        k = k + 1
+        flatRoots[rowStarts[active] + k] = x
+        flatBoundaries[boundaryRowStarts[active] + k] = crossings
+        flatBoundaries[boundaryRowStarts[active] + k + 1] = inf
+        last[active] = k
+
+    # Read off the envelope. Parabola k is the lowest for the x with
+    # boundaries[k] < x <= boundaries[k + 1], so the root for every x
+    # is found by repeating each root by the number of such x. Rows
+    # with no finite values stay infinite.
+    squaredDistances = numpy.full((height, width), inf)
+    envelopeRows = rows[last >= 0]
+    if (len(envelopeRows) == 0):
+        return squaredDistances
+    inEnvelope = (numpy.arange(width) <= last[envelopeRows, None])
+    limits = numpy.clip(numpy.floor(boundaries[envelopeRows]), -1, width - 1)
+    counts = (limits[:, 1:] - limits[:, :-1]).astype(numpy.intp)
+    envelopeRoots = numpy.repeat(roots[envelopeRows][inEnvelope], counts[inEnvelope])
+    envelopeRoots = envelopeRoots.reshape(len(envelopeRows), width)
+    offsets = numpy.arange(width) - envelopeRoots
+    squaredDistances[envelopeRows] = offsets * offsets + \
+        f[envelopeRows[:, None], envelopeRoots]
+    return squaredDistances
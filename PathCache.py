@@ -0,0 +1,99 @@
+from Cell import Cell
+from PlannedPath import PlannedPath
+from collections import OrderedDict
+
+# The attributes of a planner which can change the path it finds. Those
+# which a planner has are added to the key of its paths.
+CONFIGURATION_ATTRIBUTES = ("Heuristic", "heuristicFunction", "Hscale", "costModel", \
+                            "useHeuristicField", "useCostToGoField", "searchGridClass", \
+                            "initialEpsilon", "epsilonDecrement", "clusterSize")
+
+# This class caches planned paths, so that repeated queries for the
+# same start and goal do not have to search again. It sits in front
+# of any planner:
+#
+#   cache = PathCache(maximumSize=1000)
+#   path = cache.plan(planner, startCoords, goalCoords)
+#
+# A path is stored under the type of the planner, its configuration
+# (the heuristic, cost model, search grid class and so on, see
+# CONFIGURATION_ATTRIBUTES), the start, the goal, the occupancy grid
+# and the version of the occupancy grid. Changing a cell of the map
+# changes the version, so paths planned on the old map are never
+# returned. When the cache is full, the least recently used path is
+# dropped.
+#
+# The cells of a path belong to the search grid of the planner, and
+# are reset by its next search. The cache therefore only stores the
+# coordinates and path cost of each waypoint. A hit returns a new
+# PlannedPath made of new cells, without running the planner or
+# touching its search grid.
+
+class PathCache(object):
+
+    def __init__(this, maximumSize=1024):
+        this.maximumSize = maximumSize
+        this.paths = OrderedDict()
+        this.hits = 0
+        this.misses = 0
+
+    # The key used to store the path for a query
+    def getKey(this, planner, startCoords, goalCoords):
+        occupancyGrid = planner.occupancyGrid
+        configuration = tuple((name, getattr(planner, name)) for name in CONFIGURATION_ATTRIBUTES \
+                              if hasattr(planner, name))
+        return (type(planner).__name__, configuration, tuple(startCoords), tuple(goalCoords), \
+                occupancyGrid, occupancyGrid.version)
+
+    # Return the path for a query, or None if it is not in the
+    # cache. The path becomes the most recently used one.
+    def lookup(this, key):
+        entry = this.paths.pop(key, None)
+        if (entry is None):
+            this.misses = this.misses + 1
+            return None
+        this.hits = this.hits + 1
+        this.paths[key] = entry
+        goalReached, waypoints = entry
+        path = PlannedPath()
+        path.goalReached = goalReached
+        for (coords, pathCost) in waypoints:
+            cell = Cell(coords, 0)
+            cell.pathCost = pathCost
+            path.waypoints.append(cell)
+        return path
+
+    # Store a path, dropping the least recently used one if the cache
+    # is full.
+    def store(this, key, path):
+        waypoints = tuple((tuple(cell.coords), cell.pathCost) for cell in path.waypoints)
+        this.paths.pop(key, None)
+        this.paths[key] = (path.goalReached, waypoints)
+        while (len(this.paths) > this.maximumSize):
+            this.paths.popitem(last=False)
+
+    # Return the path from startCoords to goalCoords, running the
+    # planner only if the path is not in the cache.
+    def plan(this, planner, startCoords, goalCoords):
+        key = this.getKey(planner, startCoords, goalCoords)
+        path = this.lookup(key)
+        if (path is None):
+            planner.plan(startCoords, goalCoords)
+            path = planner.extractPathToGoal()
+            this.store(key, path)
+        return path
+
+    # Remove all the paths and reset the counters
+    def clear(this):
+        this.paths.clear()
+        this.hits = 0
+        this.misses = 0
+
+    def getNumberOfHits(this):
+        return this.hits
+
+    def getNumberOfMisses(this):
+        return this.misses
+
+    def __len__(this):
+        return len(this.paths)
@@ -1,8 +1,10 @@
 from OccupancyGrid import OccupancyGrid
-from SearchGrid import SearchGrid
-from GridDrawer import GridDrawer
+from SearchGrid import SearchGrid, NEIGHBOUR_OFFSETS_FROM_MASK
 from Cell import CellLabel
 from PlannedPath import PlannedPath
+from SearchStats import SearchStats
+from CostModel import CostModel
+from SearchTrace import SearchTraceWriter
 import time
 import math
 from collections import deque
@@ -18,13 +20,19 @@ from collections import deque
 # The code includes a number of hooks which do not appear in LaValle's
 # description, but are useful when implementing some techniques. In
 # addition, the code can optionally use a graphics library to draw the
-# grid cells.
+# grid cells. The graphics library is only imported when graphics are
+# actually shown. This means that planners created with showGraphics
+# set to False never touch Tk and can run on machines without a
+# display.
 
 # The planner itself takes an occupancy map as an input. This
 # specifies the structure of the environment - basically how big is
 # it, which cells are blocked and which cells are open. The planner
 # internally constructs a SearchGrid. This contains the nodes and
-# edges from the planner and the labels associated with them.
+# edges from the planner and the labels associated with them. The
+# class used for the search grid can be changed by setting
+# searchGridClass, for example to ArraySearchGrid, which stores the
+# cells in flat arrays.
 
 class PlannerBase(object):
 
@@ -32,11 +40,33 @@ class PlannerBase(object):
     def __init__(this, occupancyGrid):
         this.occupancyGrid = occupancyGrid;
         this.searchGrid = None
+        this.searchGridClass = SearchGrid
         this.pauseTimeInSeconds = 0.05
+        this.expansionsPerFrame = None
+        this.lastDrawTime = 0
+        this.numberOfExpansionsSinceDraw = 0
         this.showGraphics = True
         this.showGraphicsEachIteration = False
+        this.printResults = True
         this.goalReached = None
         this.gridDrawer = None
+        this.gridDrawerFactory = None
+        this.stats = None
+        this.activeStats = None
+        this.instrumentedMethods = []
+        this.costModel = CostModel()
+        this.changedCells = None
+        this.trace = None
+
+    # Construct a planner which does not draw anything. The arguments
+    # are passed on to the constructor of the planner class, for
+    # example AStarPlanner.headless(occupancyGrid, "euclidean").
+    @classmethod
+    def headless(cls, *args, **kwargs):
+        planner = cls(*args, **kwargs)
+        planner.showGraphics = False
+        planner.showGraphicsEachIteration = False
+        return planner
 
     # This method pushes a cell onto the queue Q. Its implementation
     # depends upon the type of search algorithm used. If necessary,
@@ -67,67 +97,231 @@ class PlannerBase(object):
         return cell == this.goal
 
     # This method gets the list of cells which potentially could be
-    # visited next. Each candidate position has to be tested
-    # separately.
+    # visited next. The search grid stores, for each cell, a mask of
+    # the neighbours which fall inside the grid and aren't obstructed,
+    # so the candidates are read straight from that.
     def getNextCellsToBeVisited(this, cell):
 
-        # This stores the set of valid actions / cells
-        cells = list();
+        searchGrid = this.searchGrid
+        x = cell.coords[0]
+        y = cell.coords[1]
 
-        # Go through all the neighbours and add the cells if they
-        # don't fall outside the grid and they aren't the cell we
-        # started with. The order has been manually written down to
+        # The neighbours are returned in the order given by
+        # NEIGHBOUR_OFFSETS, which has been manually written down to
         # create a spiral.
-        this.pushBackCandidateCellIfValid(cell, cells, 0, -1)
-        this.pushBackCandidateCellIfValid(cell, cells, 1, -1)
-        this.pushBackCandidateCellIfValid(cell, cells, 1, 0)
-        this.pushBackCandidateCellIfValid(cell, cells, 1, 1)
-        this.pushBackCandidateCellIfValid(cell, cells, 0, 1)
-        this.pushBackCandidateCellIfValid(cell, cells, -1, 1)
-        this.pushBackCandidateCellIfValid(cell, cells, -1, 0)
-        this.pushBackCandidateCellIfValid(cell, cells, -1, -1)
+        mask = searchGrid.neighbourMasks[y * searchGrid.width + x]
+        cells = [searchGrid.getCellFromCoords((x + offsetX, y + offsetY)) \
+                 for (offsetX, offsetY) in NEIGHBOUR_OFFSETS_FROM_MASK[mask]]
 
         return cells
 
-    # This helper method checks if the robot, at cell.coords, can move
-    # to cell.coords+(offsetX, offsetY). Reasons why it can't do this
-    # include falling off the edge of the map or running into an
-    # obstacle.
-    def pushBackCandidateCellIfValid(this, cell, cells, offsetX, offsetY):
-        newX = cell.coords[0] + offsetX
-        newY = cell.coords[1] + offsetY
-        if ((newX >= 0) & (newX < this.occupancyGrid.getWidth()) \
-            & (newY >= 0) & (newY < this.occupancyGrid.getHeight())):
-            newCoords = (newX, newY)
-            newCell = this.searchGrid.getCellFromCoords(newCoords)
-            if (newCell.label != CellLabel.OBSTRUCTED):
-                cells.append(newCell)
-
     # This method determines whether a cell has been visited already.
     def hasCellBeenVisitedAlready(this, cell):
         return (cell.label == CellLabel.OBSTRUCTED) | (cell.label == CellLabel.DEAD) \
             | (cell.label == CellLabel.ALIVE)
 
     # Mark that the cell has been visited. Also note the parent, which
-    # is used to extract the path later on.
+    # is used to extract the path later on. The cell is pushed onto the
+    # queue before it is labelled, so that the path cost computed by
+    # pushCellOntoQueue is the one recorded in a trace.
     def markCellAsVisitedAndRecordParent(this, cell, parentCell):
-        cell.label = CellLabel.ALIVE
         cell.parent = parentCell
+        this.pushCellOntoQueue(cell)
+        this.setCellLabel(cell, CellLabel.ALIVE)
 
     # Mark that a cell is dead. A dead cell is one in which all of its
     # immediate neighbours have been visited.
     def markCellAsDead(this, cell):
-        cell.label = CellLabel.DEAD
+        this.setCellLabel(cell, CellLabel.DEAD)
     
-    # Draw the output and sleep for the pause time.
+    # Change the label of a cell. When graphics are shown, the
+    # coordinates of the cell are recorded, so that the grid drawer
+    # only has to redraw the cells which have changed. If a trace is
+    # being recorded, the change is written to it. Planners should
+    # change labels through this method rather than directly.
+    def setCellLabel(this, cell, label):
+        if (this.trace is not None):
+            this.trace.recordLabelChange(cell, cell.label, label)
+        cell.label = label
+        if (this.changedCells is not None):
+            this.changedCells.add(cell.coords)
+
+    # Create the object used to draw the search grid. If
+    # gridDrawerFactory is set, it is called with the search grid to
+    # create the drawer (for example RasterDrawer, which draws into an
+    # image instead of a window). Otherwise a GridDrawer is used. The
+    # import is done here so that the graphics library (and Tk) is
+    # only loaded when graphics are required.
+    def createGridDrawer(this):
+        if (this.gridDrawerFactory is not None):
+            return this.gridDrawerFactory(this.searchGrid)
+        from GridDrawer import GridDrawer
+        return GridDrawer(this.searchGrid)
+
+    # Draw the output. The search never sleeps: when graphics are shown
+    # after each iteration, drawCurrentStateIfDue limits how often
+    # this is called instead.
     def drawCurrentState(this):
         if (this.showGraphics == True):
-            this.gridDrawer.update()
-            time.sleep(this.pauseTimeInSeconds)
+            this.updateGridDrawer()
+            this.lastDrawTime = time.time()
+            this.numberOfExpansionsSinceDraw = 0
+
+    # Called after each iteration of the search when
+    # showGraphicsEachIteration is True. A frame is drawn only if it is
+    # due: if expansionsPerFrame is set, after that many expansions;
+    # otherwise when at least pauseTimeInSeconds has passed since the
+    # last frame, as graphics.update(rate) does, but without sleeping
+    # in between. Since only the cells which changed are redrawn, the
+    # time spent drawing is bounded by the frame rate rather than
+    # growing with the number of expansions.
+    def drawCurrentStateIfDue(this):
+        this.numberOfExpansionsSinceDraw = this.numberOfExpansionsSinceDraw + 1
+        if (this.expansionsPerFrame is not None):
+            if (this.numberOfExpansionsSinceDraw < this.expansionsPerFrame):
+                return
+        elif (time.time() - this.lastDrawTime < this.pauseTimeInSeconds):
+            return
+        this.drawCurrentState()
+
+    # Redraw the cells whose labels have changed since the last update.
+    # If changedCells is None, every cell is redrawn; this is the case
+    # after the search grid has been reset, since the reset changes
+    # labels without recording them.
+    def updateGridDrawer(this):
+        this.gridDrawer.update(this.changedCells)
+        this.changedCells = set()
 
-    # Set the pause time
+    # Set the pause time: the shortest time between two frames drawn
+    # during the search. 0 draws a frame after every iteration.
     def setPauseTime(this, pauseTimeInSeconds):
         this.pauseTimeInSeconds = pauseTimeInSeconds
+
+    # Set the largest number of frames drawn per second during the
+    # search
+    def setFrameRate(this, framesPerSecond):
+        this.pauseTimeInSeconds = 1.0 / framesPerSecond
+
+    # Draw a frame every expansionsPerFrame iterations of the search,
+    # rather than at a frame rate. None goes back to the frame rate.
+    def setExpansionsPerFrame(this, expansionsPerFrame):
+        this.expansionsPerFrame = expansionsPerFrame
+
+    # Set the model used for the costs of moves between cells, for
+    # example OctileCostModel(10, 14) for integer path costs. It is
+    # used by the planners which track path costs.
+    def setCostModel(this, costModel):
+        this.costModel = costModel
+
+    # Start recording the label changes of each search, and the paths
+    # extracted, to a trace file which replayTrace.py can draw later.
+    # Recording does not need graphics to be shown.
+    def startTrace(this, filename):
+        this.stopTrace()
+        this.trace = SearchTraceWriter(filename, this.occupancyGrid.getWidth(), \
+                                       this.occupancyGrid.getHeight())
+
+    # Stop recording and close the trace file
+    def stopTrace(this):
+        if (this.trace is not None):
+            this.trace.close()
+            this.trace = None
+
+    # Turn on the instrumentation of the search. The counters and
+    # timers are kept in this.stats (a SearchStats object), which is
+    # reset at the start of each search. If callback is given,
+    # it is called as callback(stats) when plan() finishes and again
+    # when the path to the goal has been extracted.
+    #
+    # The instrumentation works by replacing the methods of this
+    # planner object with wrappers which count the calls and time the
+    # phases. Nothing is wrapped until this is called, so a planner
+    # without instrumentation runs exactly the same code as before.
+    # Planners which manage their own queues count their pushes and
+    # pops in activeStats, which is None unless the instrumentation is
+    # enabled.
+    def enableInstrumentation(this, callback=None):
+        this.disableInstrumentation()
+        stats = SearchStats()
+        this.stats = stats
+        this.activeStats = stats
+
+        plan = this.plan
+        setUpSearch = this.setUpSearch
+        extractPathToGoal = this.extractPathToGoal
+        pushCellOntoQueue = this.pushCellOntoQueue
+        popCellFromQueue = this.popCellFromQueue
+        resolveDuplicate = this.resolveDuplicate
+        getNextCellsToBeVisited = this.getNextCellsToBeVisited
+        heuristic = getattr(this, "heuristic", None)
+
+        # The statistics are reset when the search is set up, rather
+        # than when plan() is called, so that the cells popped while
+        # emptying the queue of the previous search are not counted.
+        def instrumentedPlan(startCoords, goalCoords, *args, **kwargs):
+            goalReached = plan(startCoords, goalCoords, *args, **kwargs)
+            stats.searchTimeInSeconds = time.time() - stats.searchStartTime
+            if (callback is not None):
+                callback(stats)
+            return goalReached
+
+        def instrumentedSetUpSearch(startCoords, goalCoords):
+            stats.reset()
+            startTime = time.time()
+            setUpSearch(startCoords, goalCoords)
+            stats.searchStartTime = time.time()
+            stats.resetTimeInSeconds = stats.searchStartTime - startTime
+
+        def instrumentedExtractPathToGoal():
+            startTime = time.time()
+            path = extractPathToGoal()
+            stats.extractionTimeInSeconds = time.time() - startTime
+            if (callback is not None):
+                callback(stats)
+            return path
+
+        def instrumentedPushCellOntoQueue(cell):
+            stats.recordPush()
+            return pushCellOntoQueue(cell)
+
+        def instrumentedPopCellFromQueue():
+            stats.recordPop()
+            return popCellFromQueue()
+
+        def instrumentedResolveDuplicate(cell, parentCell):
+            stats.recordDuplicate()
+            return resolveDuplicate(cell, parentCell)
+
+        def instrumentedGetNextCellsToBeVisited(cell):
+            cells = getNextCellsToBeVisited(cell)
+            stats.numberOfNeighbourChecks = stats.numberOfNeighbourChecks + len(cells)
+            return cells
+
+        def instrumentedHeuristic(*args):
+            stats.numberOfHeuristicEvaluations = stats.numberOfHeuristicEvaluations + 1
+            return heuristic(*args)
+
+        this.plan = instrumentedPlan
+        this.setUpSearch = instrumentedSetUpSearch
+        this.extractPathToGoal = instrumentedExtractPathToGoal
+        this.pushCellOntoQueue = instrumentedPushCellOntoQueue
+        this.popCellFromQueue = instrumentedPopCellFromQueue
+        this.resolveDuplicate = instrumentedResolveDuplicate
+        this.getNextCellsToBeVisited = instrumentedGetNextCellsToBeVisited
+        this.instrumentedMethods = ["plan", "setUpSearch", "extractPathToGoal", \
+                                    "pushCellOntoQueue", "popCellFromQueue", \
+                                    "resolveDuplicate", "getNextCellsToBeVisited"]
+        if (heuristic is not None):
+            this.heuristic = instrumentedHeuristic
+            this.instrumentedMethods.append("heuristic")
+
+    # Turn off the instrumentation and go back to the plain methods.
+    # The statistics of the last search are kept in this.stats.
+    def disableInstrumentation(this):
+        for name in this.instrumentedMethods:
+            delattr(this, name)
+        this.instrumentedMethods = []
+        this.activeStats = None
         
     # The main search routine. Given the input startCoords (x,y) and
     # goalCoords (x,y), compute a plan. Note that the coordinates
@@ -138,32 +332,11 @@ class PlannerBase(object):
         while (this.isQueueEmpty() == False):
             this.popCellFromQueue()
         
-        # Create the search grid from the occupancy grid and seed
-        # unvisited and occupied cells.
-        if (this.searchGrid is None):
-            this.searchGrid = SearchGrid.fromOccupancyGrid(this.occupancyGrid)
-        else:
-            this.searchGrid.setFromOccupancyGrid(this.occupancyGrid)
-
-        # Get the start cell object and label it as such. Also set its
-        # path cost to 0.
-        this.start = this.searchGrid.getCellFromCoords(startCoords)
-        this.start.label = CellLabel.START
-        this.start.pathCost = 0
-
-        # Get the goal cell object and label it.
-        this.goal = this.searchGrid.getCellFromCoords(goalCoords)
-        this.goal.label = CellLabel.GOAL
-
-        # If required, set up the grid drawer and show the initial state
-        if (this.showGraphics == True):
-            if (this.gridDrawer is None):
-                this.gridDrawer = GridDrawer(this.searchGrid);
-            this.drawCurrentState()
+        # Set up the search grid, the start and the goal
+        this.setUpSearch(startCoords, goalCoords)
 
         # Insert the start on the queue to start the process going.
         this.markCellAsVisitedAndRecordParent(this.start, None)
-        this.pushCellOntoQueue(this.start)
 
         # Reset the count
         this.numberOfCellsVisited = 0
@@ -181,7 +354,6 @@ class PlannerBase(object):
             for nextCell in cells:
                 if (this.hasCellBeenVisitedAlready(nextCell) == False):
                     this.markCellAsVisitedAndRecordParent(nextCell, cell)
-                    this.pushCellOntoQueue(nextCell)
                     this.numberOfCellsVisited = this.numberOfCellsVisited + 1
                 else:
                     this.resolveDuplicate(nextCell, cell)
@@ -192,17 +364,58 @@ class PlannerBase(object):
 
             # Draw the update if required
             if (this.showGraphicsEachIteration == True):
-                this.drawCurrentState()
+                this.drawCurrentStateIfDue()
 
         # Draw the final results if required
         this.drawCurrentState()
 
+        this.printResult()
+            
+        return this.goalReached
+
+    # Prepare the search grid for a new search from startCoords to
+    # goalCoords. This is the part of plan() which does not depend
+    # upon the search algorithm, so planners which implement their
+    # own search loop can use it as well.
+    def setUpSearch(this, startCoords, goalCoords):
+
+        # Create the search grid from the occupancy grid and seed
+        # unvisited and occupied cells. If the search grid already
+        # exists, only the cells touched by the last search are reset,
+        # unless the occupancy grid has changed.
+        if (this.searchGrid is None):
+            this.searchGrid = this.searchGridClass.fromOccupancyGrid(this.occupancyGrid)
+        else:
+            this.searchGrid.resetFromOccupancyGrid(this.occupancyGrid)
+        if (this.trace is not None):
+            this.trace.recordNewSearch(this.searchGrid)
+
+        # Get the start cell object and label it as such. Also set its
+        # path cost to 0.
+        this.start = this.searchGrid.getCellFromCoords(startCoords)
+        this.start.pathCost = 0
+        this.setCellLabel(this.start, CellLabel.START)
+
+        # Get the goal cell object and label it.
+        this.goal = this.searchGrid.getCellFromCoords(goalCoords)
+        this.setCellLabel(this.goal, CellLabel.GOAL)
+
+        # If required, set up the grid drawer and show the initial
+        # state. The whole grid is redrawn.
+        if (this.showGraphics == True):
+            if (this.gridDrawer is None):
+                this.gridDrawer = this.createGridDrawer()
+            this.changedCells = None
+            this.drawCurrentState()
+
+    # Print whether the goal was reached, unless printResults is False
+    def printResult(this):
+        if (this.printResults == False):
+            return
         if (this.goalReached == True):
             print "Reached the goal after visiting " + str(this.numberOfCellsVisited) + " cells"
         else:
             print "Could not reach the goal after visiting " + str(this.numberOfCellsVisited) + " cells"
-            
-        return this.goalReached
 
 
     # This method extracts a path from the pathEndCell to the start
@@ -232,13 +445,20 @@ class PlannerBase(object):
             cell = cell.parent
 
         # Now draw the path
-        if (this.showGraphics == True):
-            this.gridDrawer.update()
-            this.gridDrawer.drawPath(path)
+        this.drawPath(path)
 
         # Return the path
         return path
 
+    # Draw the path, if graphics are shown, and record it in the trace,
+    # if one is being recorded
+    def drawPath(this, path):
+        if (this.trace is not None):
+            this.trace.recordPath(path)
+        if (this.showGraphics == True):
+            this.updateGridDrawer()
+            this.gridDrawer.drawPath(path)
+
     # Extract the path between the start and goal.
     def extractPathToGoal(this):
         path = this.extractPath(this.goal)
@@ -0,0 +1,103 @@
+import heapq
+
+# This class implements a priority queue which is used by the planners
+# which order their cells by a score (for example, the path cost or
+# the heuristic estimate to the goal). It is based on a binary heap so
+# that pushing and popping a cell costs O(log n).
+#
+# The heap does not support changing the priority of an entry in
+# place. Instead, when the priority of an item is changed, the old
+# heap entry is marked as removed and a new one is pushed. Removed
+# entries are skipped when they reach the top of the heap ("lazy
+# invalidation").
+#
+# Ties are broken by the order in which the items were first
+# inserted (first in, first out), so that the order of expansion is
+# deterministic. Changing the priority of an item which is already on
+# the queue keeps its original insertion order. This is not the same
+# order as the dictionary-based open lists which were used before,
+# whose ties depended on the hashes of the cells, so the number of
+# cells expanded can differ slightly. A second counter makes every
+# heap entry unique, so that the items themselves are never compared.
+
+class PriorityQueue(object):
+
+    # Marker used to flag heap entries which have been superseded
+    REMOVED = object()
+
+    def __init__(this):
+        this.heap = []
+        this.entries = dict()
+        this.counter = 0
+        this.sequence = 0
+
+    # Insert the item with the given priority. If the item is already
+    # on the queue, its priority is changed to the new value.
+    def push(this, item, priority):
+        entry = this.entries.get(item)
+        if entry is None:
+            order = this.counter
+            this.counter = this.counter + 1
+        else:
+            order = entry[1]
+            entry[3] = PriorityQueue.REMOVED
+        entry = [priority, order, this.sequence, item]
+        this.sequence = this.sequence + 1
+        this.entries[item] = entry
+        heapq.heappush(this.heap, entry)
+
+    # Remove and return the item with the smallest priority.
+    def pop(this):
+        heap = this.heap
+        while heap:
+            item = heapq.heappop(heap)[3]
+            if item is not PriorityQueue.REMOVED:
+                del this.entries[item]
+                return item
+        raise KeyError("pop from an empty priority queue")
+
+    # Return the item with the smallest priority without removing it.
+    # Superseded entries at the top of the heap are discarded.
+    def peek(this):
+        heap = this.heap
+        while heap and (heap[0][3] is PriorityQueue.REMOVED):
+            heapq.heappop(heap)
+        if not heap:
+            raise KeyError("peek at an empty priority queue")
+        return heap[0][3]
+
+    # Return the smallest priority on the queue without removing the
+    # item.
+    def getTopPriority(this):
+        return this.entries[this.peek()][0]
+
+    # Remove an item from the queue. Its heap entry is marked as
+    # removed and is discarded when it reaches the top.
+    def remove(this, item):
+        entry = this.entries.pop(item)
+        entry[3] = PriorityQueue.REMOVED
+
+    # Check if the queue is empty
+    def isEmpty(this):
+        return not this.entries
+
+    # Return the priority of an item on the queue
+    def getPriority(this, item):
+        return this.entries[item][0]
+
+    # Remove all the items
+    def clear(this):
+        del this.heap[:]
+        this.entries.clear()
+        this.counter = 0
+        this.sequence = 0
+
+    def __contains__(this, item):
+        return item in this.entries
+
+    def __len__(this):
+        return len(this.entries)
+
+    # Iterate over the items on the queue, in no particular order
+    def __iter__(this):
+        return iter(this.entries)
@@ -0,0 +1,121 @@
+from Cell import CellLabel
+
+import struct
+import zlib
+
+# The colour used to draw each label, matching the colours used by
+# GridDrawer. Any other label (ALIVE) is white.
+CELL_COLOURS = {
+    CellLabel.OBSTRUCTED: (160, 32, 240),
+    CellLabel.START: (0, 255, 0),
+    CellLabel.GOAL: (0, 0, 255),
+    CellLabel.UNVISITED: (190, 190, 190),
+    CellLabel.DEAD: (0, 0, 0),
+}
+ALIVE_COLOUR = (255, 255, 255)
+PATH_COLOUR = (255, 255, 0)
+
+# This class draws the search grid into an RGB image in memory rather
+# than into a window. Each cell is a square block of cellSize x
+# cellSize pixels, so it can handle maps far larger than GridDrawer and
+# does not need a display. It has the same methods as GridDrawer, so a
+# planner can use it instead:
+#
+#   planner.gridDrawerFactory = lambda searchGrid: RasterDrawer(searchGrid)
+#   planner.plan(startCoords, goalCoords)
+#   planner.extractPathToGoal()
+#   planner.gridDrawer.save("search.png")
+#
+# Images are written as PNG or binary PPM, depending on the extension
+# of the filename. If framePattern is given (for example
+# "frames/%05d.png"), every update is also written out as a numbered
+# frame. As in GridDrawer, y increases up the image.
+
+class RasterDrawer(object):
+
+    def __init__(this, searchGrid, cellSize=1, framePattern=None):
+        this.searchGrid = searchGrid
+        this.cellSize = cellSize
+        this.framePattern = framePattern
+        this.numberOfFrames = 0
+        this.imageWidth = searchGrid.getWidth() * cellSize
+        this.imageHeight = searchGrid.getHeight() * cellSize
+        this.pixels = bytearray(this.imageWidth * this.imageHeight * 3)
+
+    # Fill the block of pixels of the cell at coords with a colour
+    def fillCell(this, coords, colour):
+        cellSize = this.cellSize
+        rowLength = this.imageWidth * 3
+        block = bytearray(colour) * cellSize
+        left = coords[0] * cellSize * 3
+        top = (this.searchGrid.getHeight() - coords[1] - 1) * cellSize
+        for row in range(top, top + cellSize):
+            start = row * rowLength + left
+            this.pixels[start:start + len(block)] = block
+
+    # Redraw the cells. If changedCells is given, only the cells with
+    # those coordinates are redrawn; otherwise every cell is.
+    def update(this, changedCells=None):
+        if (changedCells is None):
+            width = this.searchGrid.getWidth()
+            height = this.searchGrid.getHeight()
+            changedCells = [(i, j) for i in range(width) for j in range(height)]
+
+        for coords in changedCells:
+            cellLabel = this.searchGrid.getCellFromCoords(coords).label
+            this.fillCell(coords, CELL_COLOURS.get(cellLabel, ALIVE_COLOUR))
+
+        this.writeFrame()
+
+    # Draw the path
+    def drawPath(this, path):
+        for cell in path.waypoints:
+            this.fillCell(cell.coords, PATH_COLOUR)
+        this.writeFrame()
+
+    # There is nothing to wait for without a window
+    def waitForKeyPress(this):
+        pass
+
+    # Write the image to the next frame file, if frames are being saved
+    def writeFrame(this):
+        if (this.framePattern is None):
+            return
+        this.save(this.framePattern % this.numberOfFrames)
+        this.numberOfFrames = this.numberOfFrames + 1
+
+    # Write the image. Filenames ending in .ppm are written as binary
+    # PPM; anything else is written as PNG.
+    def save(this, filename):
+        if filename.lower().endswith(".ppm"):
+            this.savePpm(filename)
+        else:
+            this.savePng(filename)
+
+    def savePpm(this, filename):
+        with open(filename, "wb") as imageFile:
+            imageFile.write(b"P6\n%d %d\n255\n" % (this.imageWidth, this.imageHeight))
+            imageFile.write(this.pixels)
+
+    # Write an 8 bit RGB PNG. Each row starts with filter type 0 (no
+    # filtering) and the rows are compressed together with zlib.
+    def savePng(this, filename):
+        rowLength = this.imageWidth * 3
+        rows = bytearray()
+        for row in range(this.imageHeight):
+            rows.append(0)
+            rows.extend(this.pixels[row * rowLength:(row + 1) * rowLength])
+
+        header = struct.pack(">IIBBBBB", this.imageWidth, this.imageHeight, 8, 2, 0, 0, 0)
+        with open(filename, "wb") as imageFile:
+            imageFile.write(b"\x89PNG\r\n\x1a\n")
+            writePngChunk(imageFile, b"IHDR", header)
+            writePngChunk(imageFile, b"IDAT", zlib.compress(bytes(rows), 6))
+            writePngChunk(imageFile, b"IEND", b"")
+
+# Write one chunk of a PNG file: its length, type, data and CRC
+def writePngChunk(imageFile, chunkType, data):
+    imageFile.write(struct.pack(">I", len(data)))
+    imageFile.write(chunkType)
+    imageFile.write(data)
+    imageFile.write(struct.pack(">I", zlib.crc32(chunkType + data) & 0xffffffff))
@@ -1,13 +1,42 @@
 from Cell import Cell
 
+# The offsets of the eight neighbours of a cell. The order has been
+# manually written down to create a spiral. Bit i of a neighbour mask
+# refers to NEIGHBOUR_OFFSETS[i].
+NEIGHBOUR_OFFSETS = ((0, -1), (1, -1), (1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1))
+
+# For each of the 256 possible neighbour masks, the offsets of the
+# neighbours which are set in the mask, in spiral order.
+NEIGHBOUR_OFFSETS_FROM_MASK = tuple(tuple(NEIGHBOUR_OFFSETS[i] for i in range(8) if (mask & (1 << i))) \
+                                    for mask in range(256))
+
 class SearchGrid(object):
 
     # This class stores the state of a search grid to illustrate forward search
 
+    # Rebuilding every cell at the start of each search is expensive on
+    # large maps, even when the search itself only looks at a few
+    # cells. Therefore, the grid keeps a list of the cells which have
+    # been touched (returned by getCellFromCoords) since the last
+    # reset. Each cell is stamped with the generation in which it was
+    # touched, so it is only added to the list once. A reset then only
+    # has to restore the touched cells. The whole grid is only rebuilt
+    # if the occupancy grid has changed.
+
+    # The grid also stores, for each cell, a mask of the neighbours
+    # which lie inside the grid and are not obstructed. This is
+    # computed once when the grid is built from a new version of the
+    # occupancy grid, so that the planners do not have to repeat the
+    # bounds and obstacle checks for each expansion.
+
     def __init__(this, width, height, resolution):
         this.width = width
         this.height = height
         this.resolution = resolution
+        this.occupancyGrid = None
+        this.occupancyGridVersion = None
+        this.touchedCells = []
+        this.generation = 1
 
     # Construct the class using an occupancy grid object
     @classmethod
@@ -17,16 +46,96 @@ class SearchGrid(object):
 
         # Populate the search grid from the occupancy grid
         this.setFromOccupancyGrid(occupancyGrid)
-        
+
         return this
 
     # Reset the state of the search grid to the value of the occupancy grid
     def setFromOccupancyGrid(this, occupancyGrid):
+        this.createCells(occupancyGrid)
+        this.createNeighbourMasks(occupancyGrid)
+        this.occupancyGrid = occupancyGrid
+        this.occupancyGridVersion = occupancyGrid.version
+        this.touchedCells = []
+        this.generation = 1
+
+    # Reset the state of the search grid before a new search. If the
+    # occupancy grid is the one the search grid was built from and it
+    # has not changed since, only the touched cells are reset.
+    # Otherwise the whole grid is rebuilt.
+    def resetFromOccupancyGrid(this, occupancyGrid):
+        if ((occupancyGrid is this.occupancyGrid) and \
+            (occupancyGrid.version == this.occupancyGridVersion)):
+            this.resetTouchedCells()
+        else:
+            this.setFromOccupancyGrid(occupancyGrid)
+
+    # Create the cells from the occupancy grid
+    def createCells(this, occupancyGrid):
         this.grid = [[Cell((x, y), occupancyGrid.getCell(x,y)) for y in range(this.height)] \
                      for x in range(this.width)]
 
+    # Work out which cells are free and, for each cell, the mask of its
+    # free neighbours. Both are stored in flat arrays indexed by
+    # y * width + x.
+    def createNeighbourMasks(this, occupancyGrid):
+        width = this.width
+        height = this.height
+        if (occupancyGrid.useArray == True):
+            this.createNeighbourMasksVectorized(occupancyGrid)
+            return
+        this.freeCells = bytearray(width * height)
+        for y in range(height):
+            for x in range(width):
+                if (occupancyGrid.getCell(x, y) <= 0):
+                    this.freeCells[y * width + x] = 1
+        this.neighbourMasks = bytearray(width * height)
+        for y in range(height):
+            for x in range(width):
+                mask = 0
+                for i in range(8):
+                    newX = x + NEIGHBOUR_OFFSETS[i][0]
+                    newY = y + NEIGHBOUR_OFFSETS[i][1]
+                    if ((newX >= 0) and (newX < width) and (newY >= 0) and (newY < height) \
+                        and this.freeCells[newY * width + newX]):
+                        mask |= 1 << i
+                this.neighbourMasks[y * width + x] = mask
+
+    # Array backend version of createNeighbourMasks. The free cells are
+    # padded with a border of obstructed cells, and each bit of the
+    # masks is computed for the whole grid with one shifted slice.
+    def createNeighbourMasksVectorized(this, occupancyGrid):
+        import numpy
+        width = this.width
+        height = this.height
+        free = ~occupancyGrid.getBlockedArray()
+        padded = numpy.zeros((height + 2, width + 2), dtype=bool)
+        padded[1:-1, 1:-1] = free
+        masks = numpy.zeros((height, width), dtype=numpy.uint8)
+        for i in range(8):
+            offsetX, offsetY = NEIGHBOUR_OFFSETS[i]
+            neighbourFree = padded[1 + offsetY:height + 1 + offsetY, 1 + offsetX:width + 1 + offsetX]
+            masks |= neighbourFree.astype(numpy.uint8) << i
+        this.freeCells = bytearray(free.astype(numpy.uint8).tobytes())
+        this.neighbourMasks = bytearray(masks.tobytes())
+
+    # Get the mask of the free neighbours of the cell at (x, y)
+    def getNeighbourMask(this, x, y):
+        return this.neighbourMasks[y * this.width + x]
+
+    # Restore the cells touched since the last reset to their initial
+    # state, and start a new generation.
+    def resetTouchedCells(this):
+        for cell in this.touchedCells:
+            cell.reset(this.occupancyGrid.getCell(cell.coords[0], cell.coords[1]))
+        this.touchedCells = []
+        this.generation = this.generation + 1
+
     def getCellFromCoords(this, coords):
-        return this.grid[coords[0]][coords[1]]
+        cell = this.grid[coords[0]][coords[1]]
+        if (cell.generation != this.generation):
+            cell.generation = this.generation
+            this.touchedCells.append(cell)
+        return cell
 
     def getWidth(this):
         return this.width
@@ -0,0 +1,73 @@
+# This class holds the statistics gathered about a search when the
+# instrumentation of a planner is enabled (see
+# PlannerBase.enableInstrumentation). The counters and timers cover
+# the most recent call to plan(), and the extraction time covers the
+# most recent path extraction.
+#
+# The counters are:
+#
+#   numberOfPushes - cells added to the open list
+#   numberOfPops - cells taken off the open list
+#   numberOfDuplicates - calls to resolveDuplicate
+#   numberOfHeuristicEvaluations - calls to the planner's heuristic
+#   numberOfNeighbourChecks - neighbours returned for expanded cells
+#   peakOpenListSize - the largest number of cells on the open list
+#
+# The open list size is the number of pushes minus the number of
+# pops. Changing the priority of a cell already on the open list (in
+# resolveDuplicate) does not add to it.
+#
+# Planners which manage their own queues rather than going through
+# pushCellOntoQueue, popCellFromQueue and resolveDuplicate (ARA*, the
+# bidirectional search and D* Lite) call recordPush, recordPop and
+# recordDuplicate themselves.
+
+class SearchStats(object):
+
+    def __init__(this):
+        this.reset()
+
+    # Clear all the counters and timers
+    def reset(this):
+        this.numberOfPushes = 0
+        this.numberOfPops = 0
+        this.numberOfDuplicates = 0
+        this.numberOfHeuristicEvaluations = 0
+        this.numberOfNeighbourChecks = 0
+        this.openListSize = 0
+        this.peakOpenListSize = 0
+        this.resetTimeInSeconds = 0
+        this.searchTimeInSeconds = 0
+        this.extractionTimeInSeconds = 0
+        this.searchStartTime = 0
+
+    # Count a cell added to the open list
+    def recordPush(this):
+        this.numberOfPushes = this.numberOfPushes + 1
+        this.openListSize = this.openListSize + 1
+        if (this.openListSize > this.peakOpenListSize):
+            this.peakOpenListSize = this.openListSize
+
+    # Count a cell taken off the open list
+    def recordPop(this):
+        this.numberOfPops = this.numberOfPops + 1
+        this.openListSize = this.openListSize - 1
+
+    # Count a cell which was reached again by a shorter path
+    def recordDuplicate(this):
+        this.numberOfDuplicates = this.numberOfDuplicates + 1
+
+    # Return the statistics as a dictionary, for example to send them
+    # to a metrics system or write them as JSON.
+    def asDictionary(this):
+        return {
+            "numberOfPushes": this.numberOfPushes,
+            "numberOfPops": this.numberOfPops,
+            "numberOfDuplicates": this.numberOfDuplicates,
+            "numberOfHeuristicEvaluations": this.numberOfHeuristicEvaluations,
+            "numberOfNeighbourChecks": this.numberOfNeighbourChecks,
+            "peakOpenListSize": this.peakOpenListSize,
+            "resetTimeInSeconds": this.resetTimeInSeconds,
+            "searchTimeInSeconds": this.searchTimeInSeconds,
+            "extractionTimeInSeconds": this.extractionTimeInSeconds,
+        }
@@ -0,0 +1,176 @@
+from Cell import CellLabel
+from ArraySearchGrid import LABELS_FROM_CODES
+from array import array
+from collections import namedtuple
+
+import struct
+
+# Classes for recording a search to a file and reading it back, so that
+# the search can be replayed and drawn later (see replayTrace.py)
+# rather than watched live. A planner records a trace with
+#
+#   planner.startTrace("search.trace")
+#   planner.plan(startCoords, goalCoords)
+#   planner.extractPathToGoal()
+#   planner.stopTrace()
+#
+# The file starts with a header giving the size of the grid, followed
+# by fixed size records of 10 bytes:
+#
+#   index     32 bit int     y * width + x of the cell
+#   oldLabel  8 bit int      the value of the CellLabel before the change
+#   newLabel  8 bit int      the value of the CellLabel after the change
+#   cost      32 bit float   the path cost of the cell
+#
+# All values are little endian. Records with a negative index are
+# markers. NEW_SEARCH starts a search: every cell which is not
+# obstructed goes back to unvisited. OBSTACLES is written when the
+# search grid is built from a new or changed map, and is followed by
+# one record for each obstructed cell. PATH is followed by cost (the
+# number of waypoints) records giving the cells of the path found.
+#
+# Records are packed with a precompiled struct and written through
+# the buffered file, so recording costs little more than the label
+# change itself.
+
+NEW_SEARCH = -1
+OBSTACLES = -2
+PATH = -3
+
+HEADER = struct.Struct("<4sii")
+RECORD = struct.Struct("<ibbf")
+
+TraceRecord = namedtuple("TraceRecord", ["index", "oldLabel", "newLabel", "cost"])
+
+# The cells returned by SearchTraceReplayGrid. They have just enough
+# for the grid drawers.
+ReplayCell = namedtuple("ReplayCell", ["coords", "label", "pathCost"])
+
+# This class writes a trace file
+class SearchTraceWriter(object):
+
+    # The start of the file format
+    MAGIC = b"TRC1"
+
+    def __init__(this, filename, width, height):
+        this.width = width
+        this.height = height
+        this.traceFile = open(filename, "wb")
+        this.traceFile.write(HEADER.pack(SearchTraceWriter.MAGIC, width, height))
+        this.packRecord = RECORD.pack
+        this.occupancyGrid = None
+        this.occupancyGridVersion = None
+
+    # Record the start of a search on searchGrid. The obstructed cells
+    # are written out the first time, and again whenever the map the
+    # search grid was built from has changed.
+    def recordNewSearch(this, searchGrid):
+        write = this.traceFile.write
+        write(this.packRecord(NEW_SEARCH, 0, 0, 0))
+        if ((searchGrid.occupancyGrid is this.occupancyGrid) and \
+            (searchGrid.occupancyGridVersion == this.occupancyGridVersion)):
+            return
+        this.occupancyGrid = searchGrid.occupancyGrid
+        this.occupancyGridVersion = searchGrid.occupancyGridVersion
+        write(this.packRecord(OBSTACLES, 0, 0, 0))
+        obstructed = CellLabel.OBSTRUCTED.value
+        freeCells = searchGrid.freeCells
+        for index in range(len(freeCells)):
+            if (freeCells[index] == 0):
+                write(this.packRecord(index, obstructed, obstructed, 0))
+
+    # Record that the label of cell is changing from oldLabel to
+    # newLabel
+    def recordLabelChange(this, cell, oldLabel, newLabel):
+        coords = cell.coords
+        this.traceFile.write(this.packRecord(coords[1] * this.width + coords[0], \
+                                             oldLabel.value, newLabel.value, cell.pathCost))
+
+    # Record the cells of a path
+    def recordPath(this, path):
+        write = this.traceFile.write
+        write(this.packRecord(PATH, 0, 0, len(path.waypoints)))
+        for cell in path.waypoints:
+            coords = cell.coords
+            write(this.packRecord(coords[1] * this.width + coords[0], 0, 0, cell.pathCost))
+
+    def close(this):
+        this.traceFile.close()
+
+# This class reads a trace file. The records are read in blocks, and
+# iterating over the reader gives them one at a time as TraceRecords.
+class SearchTraceReader(object):
+
+    # The number of records read at a time
+    RECORDS_PER_BLOCK = 4096
+
+    def __init__(this, filename):
+        this.traceFile = open(filename, "rb")
+        header = this.traceFile.read(HEADER.size)
+        if (len(header) < HEADER.size):
+            raise ValueError(filename + " is not a trace file")
+        magic, this.width, this.height = HEADER.unpack(header)
+        if (magic != SearchTraceWriter.MAGIC):
+            raise ValueError(filename + " is not a trace file")
+
+    def getWidth(this):
+        return this.width
+
+    def getHeight(this):
+        return this.height
+
+    def __iter__(this):
+        size = RECORD.size
+        unpackRecord = RECORD.unpack_from
+        while True:
+            block = this.traceFile.read(size * SearchTraceReader.RECORDS_PER_BLOCK)
+            for offset in range(0, len(block) - size + 1, size):
+                yield TraceRecord(*unpackRecord(block, offset))
+            if (len(block) < size * SearchTraceReader.RECORDS_PER_BLOCK):
+                return
+
+    def close(this):
+        this.traceFile.close()
+
+# This class holds the labels of the cells while a trace is replayed.
+# It has the methods of the search grid which GridDrawer and
+# RasterDrawer use, so either can draw it.
+class SearchTraceReplayGrid(object):
+
+    def __init__(this, width, height):
+        this.width = width
+        this.height = height
+        this.initialLabels = array('b', [CellLabel.UNVISITED.value]) * (width * height)
+        this.labels = array('b', this.initialLabels)
+        this.pathCosts = array('f', [float("inf")]) * (width * height)
+
+    def getWidth(this):
+        return this.width
+
+    def getHeight(this):
+        return this.height
+
+    def getCellFromCoords(this, coords):
+        index = coords[1] * this.width + coords[0]
+        return ReplayCell(coords, LABELS_FROM_CODES[this.labels[index]], this.pathCosts[index])
+
+    def getCoordsFromIndex(this, index):
+        return (index % this.width, index // this.width)
+
+    # Put every cell back in the state it has before a search starts
+    def resetLabels(this):
+        this.labels = array('b', this.initialLabels)
+        this.pathCosts = array('f', [float("inf")]) * (this.width * this.height)
+
+    # Forget the obstructed cells, before a new set is read
+    def clearObstacles(this):
+        this.initialLabels = array('b', [CellLabel.UNVISITED.value]) * (this.width * this.height)
+        this.resetLabels()
+
+    # Apply a label change record. Obstructed cells stay obstructed
+    # when the labels are reset.
+    def applyRecord(this, record):
+        this.labels[record.index] = record.newLabel
+        this.pathCosts[record.index] = record.cost
+        if (record.newLabel == CellLabel.OBSTRUCTED.value):
+            this.initialLabels[record.index] = record.newLabel
@@ -0,0 +1,112 @@
+#! /usr/bin/env python
+
+# Replay a trace recorded with PlannerBase.startTrace, drawing the
+# search as it happened. For example:
+#
+#   ./replayTrace.py search.trace --records-per-frame 50 --frame-rate 30
+#   ./replayTrace.py search.trace --raster "frames/%05d.png" --cell-size 4
+#
+# By default the search is drawn in a GridDrawer window. With --raster,
+# it is drawn by a RasterDrawer and each frame is written to an image
+# file instead, which does not need a display and works for large maps.
+# A frame is drawn every recordsPerFrame label changes, so the speed of
+# the replay does not depend on how fast the search originally ran.
+
+from SearchTrace import SearchTraceReader, SearchTraceReplayGrid, NEW_SEARCH, OBSTACLES, PATH
+from RasterDrawer import RasterDrawer
+from PlannedPath import PlannedPath
+
+import argparse
+import time
+
+# This class applies the records of a trace to a replay grid and draws
+# a frame whenever enough of them have been applied
+class TraceReplayer(object):
+
+    def __init__(this, reader, gridDrawerFactory, recordsPerFrame, framesPerSecond=None):
+        this.reader = reader
+        this.grid = SearchTraceReplayGrid(reader.getWidth(), reader.getHeight())
+        this.gridDrawer = gridDrawerFactory(this.grid)
+        this.recordsPerFrame = recordsPerFrame
+        this.framesPerSecond = framesPerSecond
+        this.changedCells = None
+        this.numberOfRecordsSinceDraw = 0
+        this.lastDrawTime = 0
+
+    # Replay the whole trace. As in the original search, a path stays
+    # drawn until the labels of its cells change, so if the trace ends
+    # with a path, the last frame shows it.
+    def run(this):
+        records = iter(this.reader)
+        for record in records:
+            if (record.index == NEW_SEARCH):
+                this.drawFrame()
+                this.grid.resetLabels()
+                this.changedCells = None
+            elif (record.index == OBSTACLES):
+                this.grid.clearObstacles()
+                this.changedCells = None
+            elif (record.index == PATH):
+                path = PlannedPath()
+                for i in range(int(record.cost)):
+                    coords = this.grid.getCoordsFromIndex(next(records).index)
+                    path.waypoints.append(this.grid.getCellFromCoords(coords))
+                this.drawFrame()
+                this.gridDrawer.drawPath(path)
+            else:
+                this.grid.applyRecord(record)
+                if (this.changedCells is not None):
+                    this.changedCells.add(this.grid.getCoordsFromIndex(record.index))
+                this.numberOfRecordsSinceDraw = this.numberOfRecordsSinceDraw + 1
+                if (this.numberOfRecordsSinceDraw >= this.recordsPerFrame):
+                    this.drawFrame()
+        this.drawFrame()
+
+    # Draw the cells changed since the last frame, waiting first if
+    # the frame rate is limited
+    def drawFrame(this):
+        if ((this.changedCells is not None) and (len(this.changedCells) == 0)):
+            return
+        if (this.framesPerSecond is not None):
+            pauseLength = 1.0 / this.framesPerSecond - (time.time() - this.lastDrawTime)
+            if (pauseLength > 0):
+                time.sleep(pauseLength)
+        this.gridDrawer.update(this.changedCells)
+        this.lastDrawTime = time.time()
+        this.changedCells = set()
+        this.numberOfRecordsSinceDraw = 0
+
+def parseArguments():
+    parser = argparse.ArgumentParser(description="Replay a search trace")
+    parser.add_argument("trace", help="the trace file to replay")
+    parser.add_argument("--records-per-frame", type=int, default=100, \
+                        help="the number of label changes drawn in each frame")
+    parser.add_argument("--frame-rate", type=float, default=30, \
+                        help="the largest number of frames drawn per second in the window")
+    parser.add_argument("--raster", metavar="PATTERN", \
+                        help="write the frames to numbered image files, for example frames/%%05d.png")
+    parser.add_argument("--cell-size", type=int, default=1, \
+                        help="the size of each cell in pixels in the image files")
+    return parser.parse_args()
+
+def main():
+    arguments = parseArguments()
+    reader = SearchTraceReader(arguments.trace)
+
+    if (arguments.raster is not None):
+        gridDrawerFactory = lambda grid: RasterDrawer(grid, arguments.cell_size, arguments.raster)
+        framesPerSecond = None
+    else:
+        # Only load the graphics library (and Tk) when it is used
+        from GridDrawer import GridDrawer
+        gridDrawerFactory = GridDrawer
+        framesPerSecond = arguments.frame_rate if (arguments.frame_rate > 0) else None
+
+    replayer = TraceReplayer(reader, gridDrawerFactory, arguments.records_per_frame, \
+                             framesPerSecond)
+    replayer.run()
+    reader.close()
+    replayer.gridDrawer.waitForKeyPress()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+#! /usr/bin/env python
+
+# Run every planner on a set of synthetic maps without graphics and
+# write the results to a JSON file, so that different versions of the
+# planners can be compared. For example:
+#
+#   ./runBenchmarks.py --sizes 64 256 --families empty maze --output results.json
+#
+# Each run happens in its own forked process. This means that the peak
+# memory (ru_maxrss) of one run does not include the memory used by
+# the others, and a run which takes longer than the timeout can be
+# killed. The maps are generated once in the parent process and are
+# inherited by the runs.
+
+from MapGenerators import MAP_GENERATORS, findFreeCellNear
+from OccupancyGrid import numpy
+from SearchGrid import SearchGrid
+from ArraySearchGrid import ArraySearchGrid
+from FIFOPlanner import FIFOPlanner
+from LIFOPlanner import LIFOPlanner
+from BestFirstPlanner import BestFirstPlanner
+from DijkstraPlanner import DijkstraPlanner
+from AStarPlanner import AStarPlanner
+from ARAStarPlanner import ARAStarPlanner
+from JPSPlanner import JPSPlanner
+from BidirectionalPlanner import BidirectionalPlanner
+from HierarchicalPlanner import HierarchicalPlanner
+from DStarLitePlanner import DStarLitePlanner
+from multiprocessing import Process, Pipe
+
+import argparse
+import json
+import resource
+import time
+
+# The planners to run. Each entry gives the name used in the results,
+# the planner class and the arguments which follow the occupancy grid.
+PLANNERS = [
+    ("FIFO", FIFOPlanner, ()),
+    ("LIFO", LIFOPlanner, ()),
+    ("BestFirst", BestFirstPlanner, ()),
+    ("Dijkstra", DijkstraPlanner, ()),
+    ("AStar-zero", AStarPlanner, ("zero",)),
+    ("AStar-euclidean", AStarPlanner, ("euclidean",)),
+    ("AStar-manhattan", AStarPlanner, ("manhattan",)),
+    ("AStar-diagonal", AStarPlanner, ("diagonal",)),
+    ("ARAStar", ARAStarPlanner, ()),
+    ("JPS", JPSPlanner, ()),
+    ("Bidirectional", BidirectionalPlanner, ("diagonal",)),
+    ("Hierarchical", HierarchicalPlanner, ()),
+    ("DStarLite", DStarLitePlanner, ()),
+]
+
+# Plan one query and send the measurements down the connection. This
+# runs in the forked process.
+def runPlanner(connection, occupancyGrid, plannerClass, plannerArguments, searchGridClass, \
+               startCoords, goalCoords):
+    try:
+        baselineMemory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # HierarchicalPlanner never draws, so it has no headless
+        # constructor
+        createPlanner = getattr(plannerClass, "headless", plannerClass)
+        planner = createPlanner(occupancyGrid, *plannerArguments)
+        planner.printResults = False
+
+        # HierarchicalPlanner builds its own grids, so the search grid
+        # class does not apply to it
+        if hasattr(planner, "searchGridClass"):
+            planner.searchGridClass = searchGridClass
+            searchGridName = searchGridClass.__name__
+        else:
+            searchGridName = None
+
+        startTime = time.time()
+        goalReached = planner.plan(startCoords, goalCoords)
+        planTime = time.time() - startTime
+        path = planner.extractPathToGoal()
+        extractTime = time.time() - startTime - planTime
+
+        result = {
+            "status": "ok",
+            "goalReached": bool(goalReached),
+            "searchGridClass": searchGridName,
+            "planTimeInSeconds": planTime,
+            "extractTimeInSeconds": extractTime,
+            "numberOfCellsVisited": getattr(planner, "numberOfCellsVisited", None),
+            "baselineMemoryInKilobytes": baselineMemory,
+            "peakMemoryInKilobytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            "numberOfWaypoints": path.getNumberOfWaypoints(),
+            "pathLength": path.getTotalLength(),
+            "pathAngle": path.getTotalAngle(),
+        }
+    except Exception as exception:
+        result = {"status": "error", "error": repr(exception)}
+    connection.send(result)
+    connection.close()
+
+# Run one planner on one map in a forked process. If it does not
+# finish within timeoutInSeconds, it is killed and the result is
+# marked as a timeout.
+def runBenchmark(occupancyGrid, plannerClass, plannerArguments, searchGridClass, \
+                 startCoords, goalCoords, timeoutInSeconds):
+    receiver, sender = Pipe(duplex=False)
+    process = Process(target=runPlanner, args=(sender, occupancyGrid, plannerClass, \
+                                               plannerArguments, searchGridClass, \
+                                               startCoords, goalCoords))
+    process.start()
+    sender.close()
+    if receiver.poll(timeoutInSeconds):
+        try:
+            result = receiver.recv()
+        except EOFError:
+            result = {"status": "error", "error": "exit code %s" % process.exitcode}
+    else:
+        result = {"status": "timeout"}
+        process.terminate()
+    process.join()
+    receiver.close()
+    return result
+
+def parseArguments():
+    parser = argparse.ArgumentParser(description="Benchmark the planners on synthetic maps")
+    parser.add_argument("--families", nargs="+", default=sorted(MAP_GENERATORS), \
+                        choices=sorted(MAP_GENERATORS), help="the map families to use")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[64, 256, 1024, 4096], \
+                        help="the widths (and heights) of the maps in cells")
+    parser.add_argument("--planners", nargs="+", default=[name for (name, c, a) in PLANNERS], \
+                        choices=[name for (name, c, a) in PLANNERS], help="the planners to run")
+    parser.add_argument("--density", type=float, default=0.2, \
+                        help="the obstacle density of the random maps")
+    parser.add_argument("--seed", type=int, default=0, help="the seed for the map generators")
+    parser.add_argument("--timeout", type=float, default=600, \
+                        help="the time allowed for each run in seconds")
+    parser.add_argument("--search-grid", choices=["array", "cells"], default="array", \
+                        help="use ArraySearchGrid or the original Cell based SearchGrid")
+    parser.add_argument("--output", default="benchmarks.json", help="the JSON file to write")
+    return parser.parse_args()
+
+def main():
+    arguments = parseArguments()
+    searchGridClass = ArraySearchGrid if (arguments.search_grid == "array") else SearchGrid
+    useArray = (numpy is not None)
+
+    results = []
+    for family in arguments.families:
+        for size in arguments.sizes:
+            generator = MAP_GENERATORS[family]
+            if (family == "random"):
+                occupancyGrid = generator(size, size, density=arguments.density, \
+                                          seed=arguments.seed, useArray=useArray)
+            else:
+                occupancyGrid = generator(size, size, seed=arguments.seed, useArray=useArray)
+
+            # Plan between the free cells nearest to opposite corners
+            startCoords = findFreeCellNear(occupancyGrid, (0, size - 1))
+            goalCoords = findFreeCellNear(occupancyGrid, (size - 1, 0))
+
+            for (name, plannerClass, plannerArguments) in PLANNERS:
+                if name not in arguments.planners:
+                    continue
+                result = runBenchmark(occupancyGrid, plannerClass, plannerArguments, \
+                                      searchGridClass, startCoords, goalCoords, \
+                                      arguments.timeout)
+                result.update({"family": family, "size": size, "planner": name, \
+                               "start": startCoords, "goal": goalCoords})
+                results.append(result)
+                print "%-8s %5d %-16s %-7s %s" % (family, size, name, result["status"], \
+                                                 result.get("planTimeInSeconds", ""))
+
+    output = {
+        "searchGrid": arguments.search_grid,
+        "density": arguments.density,
+        "seed": arguments.seed,
+        "timeoutInSeconds": arguments.timeout,
+        "results": results,
+    }
+    with open(arguments.output, "w") as outputFile:
+        json.dump(output, outputFile, indent=2, sort_keys=True)
+
+if __name__ == "__main__":
+    main()